@@ -1,12 +1,18 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
-
-from .api_views import LoginAPIView, LogoutAPIView, ProfileAPIView, RegisterAPIView
+from .api_views import (
+    AuthMetricsAPIView,
+    LoginAPIView,
+    LogoutAPIView,
+    ProfileAPIView,
+    RegisterAPIView,
+    TokenRefreshAPIView,
+)
 
 urlpatterns = [
     path('register/', RegisterAPIView.as_view(), name='api-register'),
     path('login/', LoginAPIView.as_view(), name='api-login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='api-token-refresh'),
+    path('token/refresh/', TokenRefreshAPIView.as_view(), name='api-token-refresh'),
     path('logout/', LogoutAPIView.as_view(), name='api-logout'),
     path('profile/', ProfileAPIView.as_view(), name='api-profile'),
+    path('metrics/', AuthMetricsAPIView.as_view(), name='api-auth-metrics'),
 ]
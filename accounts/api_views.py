@@ -1,19 +1,29 @@
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt.tokens import TokenError
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from smartsalon_backend import caching, metrics
 
 from .serializers import LoginSerializer, LogoutSerializer, RegisterSerializer, UserSerializer
+from .tokens import ClaimsRefreshToken, token_table_stats
+
+
+class IsAdminRole(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role == 'ADMIN')
 
 
 class RegisterAPIView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response(
             {
                 'access': str(refresh.access_token),
@@ -26,12 +36,13 @@ class RegisterAPIView(APIView):
 
 class LoginAPIView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return Response(
             {
                 'access': str(refresh.access_token),
@@ -41,6 +52,10 @@ class LoginAPIView(APIView):
         )
 
 
+class TokenRefreshAPIView(TokenRefreshView):
+    throttle_scope = 'auth'
+
+
 class ProfileAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -59,3 +74,10 @@ class LogoutAPIView(APIView):
         except TokenError:
             return Response({'detail': 'Invalid refresh token.'}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'detail': 'Logged out successfully.'}, status=status.HTTP_205_RESET_CONTENT)
+
+
+class AuthMetricsAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    def get(self, request):
+        return Response({'tokens': token_table_stats(), 'cache': caching.cache_stats(), **metrics.snapshot()})
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import CLAIM_FIELDS, VERSION_CLAIM, token_version
+
+
+def claims_user(validated_token):
+    """A ``User`` built from token claims; any other field is loaded lazily on access."""
+    User = get_user_model()
+    values = {
+        User._meta.pk.attname: User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM]),
+        'token_version': validated_token[VERSION_CLAIM],
+        **{field: validated_token[field] for field in CLAIM_FIELDS},
+    }
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that trusts the claims embedded at issuance.
+
+    Tokens minted by ``ClaimsRefreshToken`` carry the user's id, username,
+    role and profile fields, so no user query is needed per request. Changing
+    those fields bumps ``User.token_version`` and deleting the user removes
+    it, so older tokens stop matching. Tokens without the claims fall back to
+    the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        claims = (api_settings.USER_ID_CLAIM, VERSION_CLAIM, *CLAIM_FIELDS)
+        if any(claim not in validated_token for claim in claims):
+            return super().get_user(validated_token)
+        if validated_token[VERSION_CLAIM] != token_version(validated_token[api_settings.USER_ID_CLAIM]):
+            raise InvalidToken('Token is no longer valid for this user.')
+        if not validated_token['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return claims_user(validated_token)
@@ -0,0 +1,102 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from rest_framework.exceptions import Throttled
+
+from smartsalon_backend import metrics
+
+
+class HashingBusy(Throttled):
+    default_detail = 'Too many sign-ins are being processed. Please try again in a moment.'
+    default_code = 'hashing_busy'
+
+
+def _initialize_worker():
+    # Spawned workers start from a clean interpreter; settings come from DJANGO_SETTINGS_MODULE.
+    import django
+
+    django.setup()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(settings.PASSWORD_HASH_MAX_PENDING, 1))
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: forking a threaded gunicorn worker can copy held locks into the child.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_initialize_worker,
+            )
+        return _pool
+
+
+def _reset_executor(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _run(function, *args):
+    """Run a CPU-bound hashing call, off-thread when a pool is configured.
+
+    At most ``PASSWORD_HASH_MAX_PENDING`` calls per process may be running or
+    queued; past that the request is refused with a 429 straight away
+    instead of tying up a request thread behind the queue.
+    """
+    if not _slots.acquire(blocking=False):
+        metrics.increment('auth.hashing_rejected')
+        raise HashingBusy(wait=settings.PASSWORD_HASH_RETRY_AFTER)
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return function(*args)
+        pool = _executor()
+        try:
+            return pool.submit(function, *args).result()
+        except BrokenProcessPool:
+            _reset_executor(pool)
+            return function(*args)
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    return _run(make_password, password)
+
+
+def _needs_rehash(encoded):
+    preferred = get_hasher('default')
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def verify_password(user, password):
+    """``User.check_password`` with the hashing done through the pool, upgrading stale hashes."""
+    if not _run(check_password, password, user.password):
+        return False
+    if _needs_rehash(user.password):
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+    return True
@@ -0,0 +1,58 @@
+import time as perf
+from datetime import time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from accounts.tokens import ClaimsRefreshToken
+from appointments.models import StaffSchedule
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency per request for database-backed and claims-based JWT authentication.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Throttling is switched off so the bucket limits don't cut the run short.
+        with override_settings(THROTTLE_BUCKETS={}), transaction.atomic():
+            customer, paths = self._seed()
+            tokens = (
+                ('database user', str(RefreshToken.for_user(customer).access_token)),
+                ('token claims', str(ClaimsRefreshToken.for_user(customer).access_token)),
+            )
+            for path in paths:
+                for label, token in tokens:
+                    self._run(label, path, token, options['requests'])
+            transaction.set_rollback(True)
+
+    def _seed(self):
+        staff = User.objects.create_user(username='bench_auth_staff', role='STAFF')
+        customer = User.objects.create_user(username='bench_auth_customer', role='CUSTOMER')
+        slot_date = timezone.localdate() + timedelta(days=1)
+        StaffSchedule.objects.create(staff=staff, schedule_date=slot_date, start_time=time(9), end_time=time(17))
+        return customer, ['/api/staff/', f'/api/available-slots/?staff_id={staff.pk}&date={slot_date}']
+
+    def _run(self, label, path, token, requests):
+        # Views are called directly, so middleware and host checks are left out of the numbers.
+        factory = APIRequestFactory()
+        match = resolve(path.split('?')[0])
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                request = factory.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+                started = perf.perf_counter()
+                response = match.func(request, *match.args, **match.kwargs)
+                elapsed += perf.perf_counter() - started
+                assert response.status_code == 200, response.data
+        self.stdout.write(
+            f'{path.split("?")[0]:<24} {label:<14} {elapsed / requests * 1e6:9.1f} us/request '
+            f'{len(queries) / requests:5.2f} queries/request'
+        )
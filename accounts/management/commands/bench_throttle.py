@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from smartsalon_backend.throttling import STORES, TokenBucketThrottle
+
+
+class _View:
+    throttle_scope = 'slots'
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of the token-bucket throttle for each bucket store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=200)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        # Anonymous requests from distinct addresses, so every client spends from its own bucket.
+        requests = [
+            Request(factory.get('/api/available-slots/', REMOTE_ADDR=f'10.0.{n // 256}.{n % 256}'))
+            for n in range(options['clients'])
+        ]
+        view = _View()
+        count = options['requests']
+        for name in STORES:
+            with override_settings(THROTTLE_STORE=name, THROTTLE_BUCKETS={'slots': f'{count}/60'}):
+                throttle = TokenBucketThrottle()
+                allowed = 0
+                started = time.perf_counter()
+                for n in range(count):
+                    allowed += throttle.allow_request(requests[n % len(requests)], view)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{name:<6} {elapsed / count * 1e6:8.2f} us/request  {allowed}/{count} allowed'
+            )
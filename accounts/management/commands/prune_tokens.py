@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from accounts.tokens import token_table_stats
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWT rows in small batches. Safe to run from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        # Expired tokens fail validation on their own, so their rows only cost space and index depth.
+        cutoff = timezone.now()
+        before = token_table_stats(cutoff)
+        deleted = batches = 0
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff).order_by('id')
+        while ids := list(expired.values_list('id', flat=True)[: options['batch_size']]):
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                # only('id') keeps the deletion collector from loading every encoded token.
+                OutstandingToken.objects.filter(id__in=ids).only('id').delete()
+            deleted += len(ids)
+            batches += 1
+            if options['pause']:
+                time.sleep(options['pause'])
+        after = token_table_stats()
+        self.stdout.write(
+            f'deleted={deleted} batches={batches} '
+            f"outstanding={before['outstanding_tokens']}->{after['outstanding_tokens']} "
+            f"blacklisted={before['blacklisted_tokens']}->{after['blacklisted_tokens']}"
+        )
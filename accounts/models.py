@@ -12,6 +12,13 @@ class User(AbstractUser):
     )
 
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='CUSTOMER')
+    # Embedded in access tokens; bumped whenever their claims go out of date.
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} - {self.role}"
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from django.conf import settings
+
+
+class RevocationSet:
+    """Bounded, thread-safe set of blacklisted token ids that forgets them once they expire.
+
+    A token past its ``exp`` fails signature validation anyway, so expired
+    entries can be dropped without weakening the blacklist. Membership is
+    only ever a fast "yes": a miss still has to be confirmed by the
+    database, which is shared by every worker. So this only spares the
+    query for replays of revoked tokens; a first refresh or logout, the
+    normal case, still reads the blacklist tables. A per-process "known
+    valid" set could not skip that safely, since it would not see other
+    workers' revocations.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._expiry = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, exp):
+        with self._lock:
+            if jti not in self._expiry and len(self._expiry) >= self.max_size:
+                self._evict(time.time())
+            self._expiry[jti] = exp
+
+    def __contains__(self, jti):
+        exp = self._expiry.get(jti)
+        return exp is not None and exp > time.time()
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def _evict(self, now):
+        expired = [jti for jti, exp in self._expiry.items() if exp <= now]
+        for jti in expired:
+            del self._expiry[jti]
+        # Still full: drop the oldest insertions (dicts keep insertion order).
+        overflow = len(self._expiry) - self.max_size + 1
+        for jti in list(self._expiry)[:max(overflow, 0)]:
+            del self._expiry[jti]
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+
+revoked_tokens = RevocationSet(settings.TOKEN_REVOCATION_SET_SIZE)
@@ -1,8 +1,14 @@
 from django.contrib.auth import authenticate
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
 
+from smartsalon_backend import metrics
+
+from .hashing import hash_password
 from .models import User
+from .tokens import ClaimsRefreshToken, add_claims
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -19,14 +25,16 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'first_name', 'last_name', 'password']
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data.get('email', ''),
-            first_name=validated_data.get('first_name', ''),
-            last_name=validated_data.get('last_name', ''),
-            password=validated_data['password'],
-            role='CUSTOMER',
-        )
+        with metrics.timer('auth.register'):
+            user = User(
+                username=User.normalize_username(validated_data['username']),
+                email=User.objects.normalize_email(validated_data.get('email', '')),
+                first_name=validated_data.get('first_name', ''),
+                last_name=validated_data.get('last_name', ''),
+                role='CUSTOMER',
+            )
+            user.password = hash_password(validated_data['password'])
+            user.save()
         return user
 
 
@@ -35,8 +43,10 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
     def validate(self, attrs):
-        user = authenticate(username=attrs.get('username'), password=attrs.get('password'))
-        if not user:
+        with metrics.timer('auth.login'):
+            # PooledHashingBackend does the hashing off the request thread.
+            user = authenticate(self.context.get('request'), username=attrs['username'], password=attrs['password'])
+        if user is None:
             raise serializers.ValidationError('Invalid username or password.')
         attrs['user'] = user
         return attrs
@@ -47,5 +57,33 @@ class LogoutSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         refresh_token = self.validated_data['refresh']
-        token = RefreshToken(refresh_token)
+        token = ClaimsRefreshToken(refresh_token)
         token.blacklist()
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Refresh that re-reads the user so the new access token carries current claims."""
+
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        with metrics.timer('auth.refresh'):
+            return self.rotate(attrs)
+
+    def rotate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        add_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
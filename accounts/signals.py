@@ -0,0 +1,34 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from smartsalon_backend import caching
+
+from .models import User
+from .tokens import CLAIM_FIELDS, revoke_claims
+
+REVOKING_FIELDS = {*CLAIM_FIELDS, 'password'}
+STAFF_LIST_FIELDS = {'username', 'first_name', 'last_name', 'role'}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if update_fields is None or STAFF_LIST_FIELDS.intersection(update_fields):
+        # Any full save may be a role change moving a user on or off the staff list.
+        if instance.role == 'STAFF' or not created:
+            caching.invalidate(caching.STAFF)
+    if created or raw:
+        return
+    if update_fields is not None and not REVOKING_FIELDS.intersection(update_fields):
+        return
+    # Bumped in the database so the change survives cache eviction and restarts and reaches every worker.
+    User.objects.filter(pk=instance.pk).update(token_version=F('token_version') + 1)
+    instance.refresh_from_db(fields=['token_version'])
+    revoke_claims(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_claims(instance.pk)
+    if instance.role == 'STAFF':
+        caching.invalidate(caching.STAFF)
@@ -1,12 +1,26 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from . import hashing
 from .models import User
+from .tokens import ClaimsRefreshToken
 
 
 class AccountAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_api_register_returns_token(self):
@@ -36,3 +50,111 @@ class AccountAPITests(TestCase):
         authorized = self.client.get('/api/accounts/profile/')
         self.assertEqual(authorized.status_code, 200)
         self.assertEqual(authorized.data['username'], 'u1')
+
+    def test_claims_token_skips_user_query_until_user_changes(self):
+        staff = User.objects.create_user(username='claims_staff', password='SmartSalon@123', role='STAFF')
+        refresh = ClaimsRefreshToken.for_user(staff)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        # The token version is read from the database, and cached when the cache is shared; the user row never is.
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/staff/')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            self.client.get('/api/staff/')
+        with mock.patch('smartsalon_backend.caching.is_shared', return_value=True):
+            self.client.get('/api/staff/')
+            with self.assertNumQueries(0):
+                self.client.get('/api/staff/')
+        profile = self.client.get('/api/accounts/profile/')
+        self.assertEqual(profile.data['role'], 'STAFF')
+
+        staff.role = 'ADMIN'
+        staff.save(update_fields=['role'])
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 401)
+        # The version lives in the database, so losing the cache must not revive the token.
+        cache.clear()
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 401)
+
+        refreshed = self.client.post('/api/accounts/token/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(refreshed.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data['access']}")
+        self.assertEqual(self.client.get('/api/accounts/profile/').data['role'], 'ADMIN')
+
+    def test_revocation_in_another_worker_is_seen_with_a_per_process_cache(self):
+        user = User.objects.create_user(username='other_worker', password='SmartSalon@123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 200)
+        # Another worker bumps the version and clears only its own LocMemCache, leaving this one untouched.
+        User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 401)
+
+    def test_revoked_refresh_token_is_rejected_without_queries(self):
+        user = User.objects.create_user(username='logout_user', password='SmartSalon@123')
+        refresh = ClaimsRefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        response = self.client.post('/api/accounts/logout/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 205)
+
+        # Only the access token's version is looked up; the blacklist tables are not queried.
+        with self.assertNumQueries(1):
+            again = self.client.post('/api/accounts/logout/', {'refresh': str(refresh)}, format='json')
+            refreshed = self.client.post('/api/accounts/token/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(again.status_code, 400)
+        self.assertEqual(refreshed.status_code, 401)
+
+    def test_prune_tokens_deletes_only_expired_rows(self):
+        user = User.objects.create_user(username='prune_user', password='SmartSalon@123')
+        tokens = [ClaimsRefreshToken.for_user(user) for _ in range(5)]
+        tokens[0].blacklist()
+        tokens[4].blacklist()
+        expired = [token['jti'] for token in tokens[:3]]
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        output = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=output)
+        self.assertIn('deleted=3 batches=2', output.getvalue())
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list('jti', flat=True)),
+            {tokens[3]['jti'], tokens[4]['jti']},
+        )
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), [tokens[4]['jti']])
+
+    def test_login_is_refused_with_retry_after_when_hashing_is_saturated(self):
+        User.objects.create_user(username='busy_user', password='SmartSalon@123')
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        with mock.patch.object(hashing, '_slots', slots):
+            response = self.client.post(
+                '/api/accounts/login/', {'username': 'busy_user', 'password': 'SmartSalon@123'}, format='json'
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+
+    @override_settings(PASSWORD_HASH_WORKERS=1)
+    def test_login_and_register_hash_in_worker_process(self):
+        self.addCleanup(hashing.shutdown_pool)
+        User.objects.create_user(username='pool_user', password='SmartSalon@123')
+        login = self.client.post(
+            '/api/accounts/login/', {'username': 'pool_user', 'password': 'SmartSalon@123'}, format='json'
+        )
+        self.assertEqual(login.status_code, 200)
+        failed = mock.Mock()
+        user_login_failed.connect(failed)
+        self.addCleanup(user_login_failed.disconnect, failed)
+        wrong = self.client.post(
+            '/api/accounts/login/', {'username': 'pool_user', 'password': 'wrong-pass'}, format='json'
+        )
+        self.assertEqual(wrong.status_code, 400)
+        # The login goes through authenticate(), so its signal and is_active rule apply.
+        self.assertEqual(failed.call_args.kwargs['credentials']['username'], 'pool_user')
+        User.objects.filter(username='pool_user').update(is_active=False)
+        inactive = self.client.post(
+            '/api/accounts/login/', {'username': 'pool_user', 'password': 'SmartSalon@123'}, format='json'
+        )
+        self.assertEqual(inactive.status_code, 400)
+
+        response = self.client.post(
+            '/api/accounts/register/', {'username': 'pool_new', 'password': 'SmartSalon@123'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username='pool_new').check_password('SmartSalon@123'))
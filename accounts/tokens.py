@@ -0,0 +1,98 @@
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from smartsalon_backend import caching, metrics
+
+from .revocation import revoked_tokens
+
+# Copied into every token so requests can be authenticated without loading the user row.
+CLAIM_FIELDS = ('username', 'email', 'first_name', 'last_name', 'role', 'is_active')
+VERSION_CLAIM = 'ver'
+CACHE_PREFIX = 'auth'
+
+
+def _version_key(user_id):
+    return f'{CACHE_PREFIX}:version:{user_id}'
+
+
+def token_version(user_id):
+    """The user's current ``token_version``, or -1 once the user is gone.
+
+    The cache only saves the lookup: a missing entry (eviction, restart) is
+    re-read from the database, never assumed. It is used only when the cache
+    is shared, since ``revoke_claims`` in one worker cannot reach the
+    in-process caches of the others.
+    """
+    shared = caching.is_shared()
+    key = _version_key(user_id)
+    version = cache.get(key) if shared else None
+    if version is None:
+        version = get_user_model().objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+        version = -1 if version is None else version
+        if shared:
+            cache.set(key, version, timeout=None)
+    return version
+
+
+def revoke_claims(user_id):
+    """Drop the cached version after ``token_version`` changed in the database.
+
+    Dropped again on commit, in case a reader cached the old value from
+    before the transaction committed.
+    """
+    key = _version_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def add_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        return add_claims(super().for_user(user), user)
+
+    def check_blacklist(self):
+        # Tokens revoked through this process are rejected without a query.
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jti in revoked_tokens:
+            metrics.increment('auth.revocation_set_hits')
+            raise TokenError('Token is blacklisted')
+        try:
+            super().check_blacklist()
+        except TokenError:
+            revoked_tokens.add(jti, self.payload['exp'])
+            raise
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # Tokens from login, register and rotation are always outstanding, so the user lookup is skipped.
+        outstanding_id = OutstandingToken.objects.filter(jti=jti).values_list('id', flat=True).first()
+        if outstanding_id is None:
+            result = super().blacklist()
+        else:
+            result = BlacklistedToken.objects.get_or_create(token_id=outstanding_id)
+        revoked_tokens.add(jti, self.payload['exp'])
+        return result
+
+
+def token_table_stats(now=None):
+    """Row counts of the simplejwt blacklist tables, for monitoring their growth."""
+    now = now or timezone.now()
+    return {
+        'outstanding_tokens': OutstandingToken.objects.count(),
+        'expired_outstanding_tokens': OutstandingToken.objects.filter(expires_at__lte=now).count(),
+        'blacklisted_tokens': BlacklistedToken.objects.count(),
+        'revocation_set_size': len(revoked_tokens),
+    }
@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import Appointment, StaffSchedule
+from .models import (
+    Appointment,
+    DailyAppointmentRollup,
+    Service,
+    StaffSchedule,
+    StaffScheduleException,
+    StaffScheduleTemplate,
+)
 
 
 @admin.register(Appointment)
@@ -9,8 +16,47 @@ class AppointmentAdmin(admin.ModelAdmin):
     search_fields = ('customer__username', 'staff__username', 'stylist_name')
 
 
+@admin.register(Service)
+class ServiceAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'price', 'duration_minutes', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('code', 'name')
+    filter_horizontal = ('staff',)
+
+
 @admin.register(StaffSchedule)
 class StaffScheduleAdmin(admin.ModelAdmin):
     list_display = ('staff', 'schedule_date', 'start_time', 'end_time', 'is_available')
     list_filter = ('schedule_date', 'is_available')
     search_fields = ('staff__username',)
+
+
+class StaffScheduleExceptionInline(admin.TabularInline):
+    model = StaffScheduleException
+    extra = 0
+
+
+@admin.register(StaffScheduleTemplate)
+class StaffScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = ('staff', 'weekday_names', 'start_time', 'end_time', 'valid_from', 'valid_until')
+    list_filter = ('valid_from',)
+    search_fields = ('staff__username',)
+    inlines = [StaffScheduleExceptionInline]
+
+    @admin.display(description='Weekdays')
+    def weekday_names(self, obj):
+        names = dict(StaffScheduleTemplate.WEEKDAY_CHOICES)
+        return ', '.join(names[day][:3] for day in obj.weekday_list)
+
+
+@admin.register(DailyAppointmentRollup)
+class DailyAppointmentRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'staff', 'service', 'status', 'appointment_count', 'paid_amount', 'pending_amount')
+    list_filter = ('date', 'service', 'status')
+    search_fields = ('staff__username',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
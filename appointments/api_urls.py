@@ -2,18 +2,48 @@ from django.urls import path
 
 from .api_views import (
     AppointmentCancelAPIView,
+    AppointmentExportAPIView,
     AppointmentListCreateAPIView,
     AvailableSlotsAPIView,
     DashboardSummaryAPIView,
+    EarliestAvailableSlotsAPIView,
+    MonthAvailabilityAPIView,
+    ServiceDetailAPIView,
+    ServiceListCreateAPIView,
     StaffListAPIView,
+    StaffScheduleBulkCreateAPIView,
+    StaffScheduleExceptionListCreateAPIView,
     StaffScheduleListCreateAPIView,
+    StaffScheduleTemplateDetailAPIView,
+    StaffScheduleTemplateListCreateAPIView,
 )
 
 urlpatterns = [
     path('dashboard/', DashboardSummaryAPIView.as_view(), name='api-dashboard'),
+    path('services/', ServiceListCreateAPIView.as_view(), name='api-services'),
+    path('services/<int:service_id>/', ServiceDetailAPIView.as_view(), name='api-service-detail'),
     path('staff/', StaffListAPIView.as_view(), name='api-staff-list'),
     path('staff-schedules/', StaffScheduleListCreateAPIView.as_view(), name='api-staff-schedules'),
+    path('staff-schedules/bulk/', StaffScheduleBulkCreateAPIView.as_view(), name='api-staff-schedules-bulk'),
+    path(
+        'staff-schedule-templates/',
+        StaffScheduleTemplateListCreateAPIView.as_view(),
+        name='api-staff-schedule-templates',
+    ),
+    path(
+        'staff-schedule-templates/<int:template_id>/',
+        StaffScheduleTemplateDetailAPIView.as_view(),
+        name='api-staff-schedule-template-detail',
+    ),
+    path(
+        'staff-schedule-templates/<int:template_id>/exceptions/',
+        StaffScheduleExceptionListCreateAPIView.as_view(),
+        name='api-staff-schedule-template-exceptions',
+    ),
     path('available-slots/', AvailableSlotsAPIView.as_view(), name='api-available-slots'),
+    path('available-slots/month/', MonthAvailabilityAPIView.as_view(), name='api-month-availability'),
+    path('available-slots/earliest/', EarliestAvailableSlotsAPIView.as_view(), name='api-earliest-slots'),
     path('appointments/', AppointmentListCreateAPIView.as_view(), name='api-appointments'),
+    path('appointments/export/', AppointmentExportAPIView.as_view(), name='api-appointments-export'),
     path('appointments/<int:appointment_id>/cancel/', AppointmentCancelAPIView.as_view(), name='api-appointment-cancel'),
 ]
@@ -1,25 +1,95 @@
 from datetime import timedelta
 
-from django.db.models import Count, F, Q
+from django.db.models import Count, F, Q, Sum
 from django.utils import timezone
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.serializers import UserSerializer
-from payments.models import Payment
-
-from .models import Appointment, StaffSchedule
+from accounts.tokens import CLAIM_FIELDS
+from smartsalon_backend import caching
+from smartsalon_backend.conditional import conditional_response, page_validator, queryset_validator
+from smartsalon_backend.exports import ExportQuerySerializer, streaming_export
+from smartsalon_backend.pagination import KeysetPagination
+
+from .availability import (
+    availability_generation,
+    daily_slot_counts,
+    day_bounds,
+    earliest_available_slots,
+    generate_available_slots,
+    template_blocks,
+)
+from .models import SLOT_MINUTES, Appointment, DailyAppointmentRollup, Service, StaffSchedule, StaffScheduleTemplate
+from .search import search_appointments
 from .serializers import (
+    AppointmentRowSerializer,
     AppointmentSerializer,
     AvailableSlotQuerySerializer,
+    BulkStaffScheduleSerializer,
+    EarliestSlotQuerySerializer,
+    MonthAvailabilityQuerySerializer,
+    ScheduleListQuerySerializer,
+    ServiceSerializer,
+    StaffScheduleExceptionSerializer,
     StaffScheduleSerializer,
+    StaffScheduleTemplateSerializer,
     StaffSerializer,
-    generate_available_slots,
 )
 
 
+def staff_availability(request):
+    # Parsed like the query serializer does, so ``01`` or ``+1`` share staff 1's generation.
+    try:
+        staff_id = serializers.IntegerField().run_validation(request.query_params.get('staff_id'))
+    except serializers.ValidationError:
+        staff_id = None  # The view answers 400, which is never cached.
+    return availability_generation(staff_id)
+
+
+def current_slot(request):
+    # Slots stop being offered once they start, so cached answers roll over at every slot boundary.
+    now = timezone.localtime()
+    return now.date(), (now.hour * 60 + now.minute) // SLOT_MINUTES
+
+
+def appointment_list_validator(view, request):
+    # Rows also carry usernames and service names, which the generations cover. No Last-Modified: a row
+    # leaving the filter or being deleted changes the ETag but not max(updated_at).
+    return (
+        None,
+        page_validator(view, view.filter_queryset(view.get_queryset())),
+        *caching.generations([caching.STAFF, caching.SERVICES]),
+    )
+
+
+def staff_list_validator(view, request):
+    return None, caching.generation(caching.STAFF)
+
+
+def schedule_list_validator(view, request):
+    # Filtered by staff and date, so like the other listings it only gets an ETag.
+    return (
+        None,
+        *queryset_validator(view.get_queryset()),
+        *caching.generations([caching.STAFF, caching.SCHEDULES]),
+    )
+
+
+def dashboard_validator(view, request):
+    # Generations rather than aggregates over the base tables, so revalidating stays as cheap as the
+    # rollup-backed summary itself. Counts such as "upcoming" and "today" move with the clock, so there
+    # is no usable Last-Modified.
+    return (
+        None,
+        current_slot(request),
+        [getattr(request.user, field) for field in CLAIM_FIELDS],
+        *caching.generations([caching.APPOINTMENTS, caching.PAYMENTS, caching.STAFF, caching.SERVICES]),
+    )
+
+
 class IsAdminUserRole(permissions.BasePermission):
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_authenticated and request.user.role == 'ADMIN')
@@ -28,6 +98,17 @@ class IsAdminUserRole(permissions.BasePermission):
 class AppointmentListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    @property
+    def keyset_ordering(self):
+        if self.request.query_params.get('search', '').strip():
+            return ('-search_rank', 'id')
+        return ('appointment_datetime', 'id')
+
+    @conditional_response(appointment_list_validator)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
         queryset = Appointment.objects.select_related('customer', 'staff')
@@ -41,21 +122,36 @@ class AppointmentListCreateAPIView(generics.ListCreateAPIView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         if search:
-            queryset = queryset.filter(
-                Q(service__icontains=search)
-                | Q(staff__username__icontains=search)
-                | Q(customer__username__icontains=search)
-            )
+            queryset = search_appointments(queryset, search)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        keyset_fields = [field.lstrip('-') for field in self.keyset_ordering]
+        queryset = AppointmentRowSerializer.values(self.filter_queryset(self.get_queryset()), *keyset_fields)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(AppointmentRowSerializer(page).data)
+
     def perform_create(self, serializer):
         if self.request.user.role != 'CUSTOMER':
             raise PermissionDenied('Only customers can create appointments.')
-        appointment = serializer.save(customer=self.request.user)
-        Payment.objects.create(
-            appointment=appointment,
-            amount=appointment.get_service_price(),
-            status='PENDING',
+        serializer.save(customer=self.request.user)
+
+
+class AppointmentExportAPIView(AppointmentListCreateAPIView):
+    """Stream the appointment list (same scoping and filters) as CSV or NDJSON."""
+
+    http_method_names = ['get', 'head', 'options']
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        queryset = AppointmentRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        return streaming_export(
+            AppointmentRowSerializer,
+            queryset.order_by(*self.keyset_ordering),
+            'appointments',
+            **query.validated_data,
         )
 
 
@@ -83,6 +179,28 @@ class AppointmentCancelAPIView(APIView):
         return Response({'detail': 'Appointment cancelled.'})
 
 
+class ServiceListCreateAPIView(generics.ListCreateAPIView):
+    serializer_class = ServiceSerializer
+
+    def get_permissions(self):
+        if self.request.method == 'POST':
+            return [permissions.IsAuthenticated(), IsAdminUserRole()]
+        return [permissions.IsAuthenticated()]
+
+    def get_queryset(self):
+        queryset = Service.objects.prefetch_related('staff')
+        if self.request.user.role != 'ADMIN':
+            queryset = queryset.filter(is_active=True)
+        return queryset
+
+
+class ServiceDetailAPIView(generics.RetrieveUpdateAPIView):
+    serializer_class = ServiceSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserRole]
+    queryset = Service.objects.prefetch_related('staff')
+    lookup_url_kwarg = 'service_id'
+
+
 class StaffListAPIView(generics.ListAPIView):
     serializer_class = StaffSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -90,56 +208,251 @@ class StaffListAPIView(generics.ListAPIView):
     def get_queryset(self):
         return self.request.user.__class__.objects.filter(role='STAFF').order_by('username')
 
+    @conditional_response(staff_list_validator)
+    @caching.cached_response(caching.STAFF)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class StaffScheduleListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = StaffScheduleSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUserRole]
 
+    def get_query(self):
+        if not hasattr(self, '_query'):
+            serializer = ScheduleListQuerySerializer(data=self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self._query = serializer.validated_data
+        return self._query
+
     def get_queryset(self):
         queryset = StaffSchedule.objects.select_related('staff')
+        query = self.get_query()
+        if query.get('staff_id'):
+            queryset = queryset.filter(staff_id=query['staff_id'])
+        if query['window']:
+            start_date, end_date = query['window']
+            queryset = queryset.filter(schedule_date__gte=start_date, schedule_date__lt=end_date)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        schedules = list(self.filter_queryset(self.get_queryset()))
+        query = self.get_query()
+        if query['window']:
+            # Recurring templates are expanded only for the requested window.
+            staff_members = request.user.__class__.objects.filter(role='STAFF')
+            if query.get('staff_id'):
+                staff_members = staff_members.filter(pk=query['staff_id'])
+            staff_by_id = staff_members.in_bulk()
+            for staff_id, schedule_date, start_time, end_time, template_id in template_blocks(
+                list(staff_by_id), *query['window']
+            ):
+                block = StaffSchedule(
+                    staff=staff_by_id[staff_id],
+                    schedule_date=schedule_date,
+                    start_time=start_time,
+                    end_time=end_time,
+                    is_available=True,
+                )
+                block.template_id = template_id
+                schedules.append(block)
+            schedules.sort(key=lambda block: (block.schedule_date, block.start_time))
+        return Response(self.get_serializer(schedules, many=True).data)
+
+    @conditional_response(schedule_list_validator)
+    @caching.cached_response(caching.STAFF, caching.SCHEDULES)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class StaffScheduleTemplateListCreateAPIView(generics.ListCreateAPIView):
+    serializer_class = StaffScheduleTemplateSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserRole]
+
+    def get_queryset(self):
+        queryset = StaffScheduleTemplate.objects.select_related('staff')
         staff_id = self.request.query_params.get('staff_id')
-        date = self.request.query_params.get('date')
         if staff_id:
             queryset = queryset.filter(staff_id=staff_id)
-        if date:
-            queryset = queryset.filter(schedule_date=date)
         return queryset
 
 
+class StaffScheduleTemplateDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = StaffScheduleTemplateSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserRole]
+    queryset = StaffScheduleTemplate.objects.select_related('staff')
+    lookup_url_kwarg = 'template_id'
+
+
+class StaffScheduleExceptionListCreateAPIView(generics.ListCreateAPIView):
+    serializer_class = StaffScheduleExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserRole]
+
+    def get_template(self):
+        if not hasattr(self, '_template'):
+            self._template = generics.get_object_or_404(StaffScheduleTemplate, pk=self.kwargs['template_id'])
+        return self._template
+
+    def get_queryset(self):
+        return self.get_template().exceptions.all()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['template'] = self.get_template()
+        return context
+
+    def perform_create(self, serializer):
+        serializer.save(template=self.get_template())
+
+
+class StaffScheduleBulkCreateAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminUserRole]
+
+    def post(self, request):
+        serializer = BulkStaffScheduleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        schedules = serializer.save()
+        return Response(
+            {
+                'created': len(schedules),
+                'schedules': StaffScheduleSerializer(schedules, many=True).data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
 class AvailableSlotsAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'slots'
 
+    @caching.cached_response(caching.STAFF, caching.SERVICES, staff_availability, vary=current_slot)
     def get(self, request):
         serializer = AvailableSlotQuerySerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
         staff = serializer.validated_data['staff']
         slot_date = serializer.validated_data['date']
-        slots = generate_available_slots(staff, slot_date)
+        duration_minutes = serializer.validated_data['duration_minutes']
+        slots = generate_available_slots(staff, slot_date, duration_minutes)
         return Response(
             {
                 'staff_id': staff.id,
                 'staff_username': staff.username,
                 'date': str(slot_date),
-                'slot_duration_minutes': 30,
+                'slot_duration_minutes': SLOT_MINUTES,
+                'duration_minutes': duration_minutes,
                 'available_slots': [slot.isoformat() for slot in slots],
             }
         )
 
 
+class MonthAvailabilityAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'slots'
+
+    @caching.cached_response(caching.STAFF, caching.SERVICES, staff_availability, vary=current_slot)
+    def get(self, request):
+        serializer = MonthAvailabilityQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        staff = serializer.validated_data['staff']
+        month_start = serializer.validated_data['month']
+        duration_minutes = serializer.validated_data['duration_minutes']
+        counts = daily_slot_counts(staff.id, month_start, serializer.validated_data['month_end'], duration_minutes)
+        return Response(
+            {
+                'staff_id': staff.id,
+                'staff_username': staff.username,
+                'month': month_start.strftime('%Y-%m'),
+                'slot_duration_minutes': SLOT_MINUTES,
+                'duration_minutes': duration_minutes,
+                'days': [
+                    {'date': str(day), 'available_slots': count}
+                    for day, count in counts.items()
+                ],
+            }
+        )
+
+
+class EarliestAvailableSlotsAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'slots'
+
+    @caching.cached_response(
+        caching.STAFF, caching.SERVICES, caching.SCHEDULES, caching.APPOINTMENTS, vary=current_slot
+    )
+    def get(self, request):
+        serializer = EarliestSlotQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+        service = serializer.validated_data.get('service')
+        duration_minutes = serializer.validated_data['duration_minutes']
+        staff_names = dict(
+            request.user.__class__.objects.filter(role='STAFF').values_list('id', 'username')
+        )
+        slots = earliest_available_slots(
+            sorted(staff_id for staff_id in staff_names if service is None or service.allows(staff_id)),
+            start_date,
+            end_date + timedelta(days=1),
+            serializer.validated_data['limit'],
+            duration_minutes,
+        )
+        return Response(
+            {
+                'start_date': str(start_date),
+                'end_date': str(end_date),
+                'service': service.code if service else None,
+                'slot_duration_minutes': SLOT_MINUTES,
+                'duration_minutes': duration_minutes,
+                'results': [
+                    {
+                        'staff_id': staff_id,
+                        'staff_username': staff_names[staff_id],
+                        'slot': slot.isoformat(),
+                    }
+                    for slot, staff_id in slots
+                ],
+            }
+        )
+
+
 class DashboardSummaryAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_response(dashboard_validator)
     def get(self, request):
         user = request.user
         appointments = Appointment.objects.all()
         if user.role == 'CUSTOMER':
             appointments = appointments.filter(customer=user)
 
+        now = timezone.now()
         today = timezone.localdate()
-        week_end = today + timedelta(days=7)
+        today_start, today_end = day_bounds(today, today + timedelta(days=1))
+        week_end = day_bounds(today, today + timedelta(days=7))[1]
+
+        data = {'user': UserSerializer(user).data}
+        if user.role == 'CUSTOMER':
+            data.update(
+                appointments.aggregate(
+                    appointments_count=Count('id'),
+                    upcoming_count=Count('id', filter=Q(status='BOOKED', appointment_datetime__gte=now)),
+                    today_count=Count(
+                        'id',
+                        filter=Q(appointment_datetime__gte=today_start, appointment_datetime__lt=today_end),
+                    ),
+                    week_count=Count(
+                        'id',
+                        filter=Q(appointment_datetime__gte=today_start, appointment_datetime__lt=week_end),
+                    ),
+                    pending_payments=Count('payment', filter=Q(payment__status__in=['PENDING', 'REQUESTED'])),
+                    requested_payments=Count('payment', filter=Q(payment__status='REQUESTED')),
+                )
+            )
+        else:
+            data.update(self.rollup_counts(today, now, today_end))
 
         recent_appointments = appointments.select_related('customer', 'staff').order_by('-appointment_datetime')[:6]
-        recent_items = [
+        data['recent_appointments'] = [
             {
                 'id': appointment.id,
                 'customer': appointment.customer.username,
@@ -152,36 +465,37 @@ class DashboardSummaryAPIView(APIView):
             for appointment in recent_appointments
         ]
 
-        payment_scope = Payment.objects.filter(appointment__in=appointments)
-        requested_payments = payment_scope.filter(status='REQUESTED').count()
-
-        data = {
-            'user': UserSerializer(user).data,
-            'appointments_count': appointments.count(),
-            'upcoming_count': appointments.filter(
-                status='BOOKED',
-                appointment_datetime__gte=timezone.now(),
-            ).count(),
-            'today_count': appointments.filter(appointment_datetime__date=today).count(),
-            'week_count': appointments.filter(
-                appointment_datetime__date__gte=today,
-                appointment_datetime__date__lt=week_end,
-            ).count(),
-            'pending_payments': payment_scope.filter(status__in=['PENDING', 'REQUESTED']).count(),
-            'requested_payments': requested_payments,
-            'recent_appointments': recent_items,
-        }
-
         if user.role == 'ADMIN':
-            data['staff_today_load'] = list(
-                Appointment.objects.filter(
-                    status='BOOKED',
-                    appointment_datetime__date=today,
-                    staff__isnull=False,
-                )
-                .values(staff=F('staff__username'))
-                .annotate(booked_slots=Count('id'))
-                .order_by('staff')
+            staff_load = (
+                DailyAppointmentRollup.objects.filter(date=today, status='BOOKED', staff__isnull=False)
+                .values('staff__username')
+                .annotate(booked_slots=Sum('appointment_count'))
+                .filter(booked_slots__gt=0)
+                .order_by('staff__username')
             )
+            data['staff_today_load'] = [
+                {'staff': row['staff__username'], 'booked_slots': row['booked_slots']} for row in staff_load
+            ]
 
         return Response(data)
+
+    def rollup_counts(self, today, now, today_end):
+        counts = DailyAppointmentRollup.objects.aggregate(
+            appointments_count=Sum('appointment_count', default=0),
+            booked_after_today=Sum('appointment_count', filter=Q(status='BOOKED', date__gt=today), default=0),
+            today_count=Sum('appointment_count', filter=Q(date=today), default=0),
+            week_count=Sum(
+                'appointment_count',
+                filter=Q(date__gte=today, date__lt=today + timedelta(days=7)),
+                default=0,
+            ),
+            pending_payments=Sum(F('pending_payments') + F('requested_payments'), default=0),
+            requested_payments=Sum('requested_payments', default=0),
+        )
+        # Rollups are per day, so only the rest of today has to come from the appointments table.
+        counts['upcoming_count'] = counts.pop('booked_after_today') + Appointment.objects.filter(
+            status='BOOKED',
+            appointment_datetime__gte=now,
+            appointment_datetime__lt=today_end,
+        ).count()
+        return counts
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AppointmentsConfig(AppConfig):
     name = 'appointments'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(signals.ensure_search_index, sender=self)
@@ -0,0 +1,229 @@
+import heapq
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from smartsalon_backend import caching
+
+from .models import SLOT_MINUTES, Appointment, StaffSchedule, StaffScheduleException, StaffScheduleTemplate
+
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+CACHE_PREFIX = 'availability'
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def block_mask(start_time, end_time):
+    """Bitmask of the day slots that fit completely inside a schedule block."""
+    start = _minutes(start_time) + (1 if start_time.second or start_time.microsecond else 0)
+    first = -(-start // SLOT_MINUTES)
+    last = _minutes(end_time) // SLOT_MINUTES
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def booking_mask(local_start, duration_minutes):
+    """Bitmask of the day slots an appointment overlaps."""
+    start = _minutes(local_start)
+    first = start // SLOT_MINUTES
+    last = min(-(-(start + duration_minutes) // SLOT_MINUTES), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def fit_mask(mask, duration_minutes):
+    """Start slots from which a ``duration_minutes`` booking fits entirely in ``mask``.
+
+    A start bit survives only if the following slots it would occupy are free
+    too; bits past the end of the day are zero, so bookings never cross midnight.
+    """
+    fitted = mask
+    for offset in range(1, -(-duration_minutes // SLOT_MINUTES)):
+        fitted &= mask >> offset
+    return fitted
+
+
+def day_bounds(start_date, end_date, tz=None):
+    """Aware half-open datetime range covering local dates [start_date, end_date)."""
+    tz = tz or timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start_date, time.min), timezone=tz),
+        timezone.make_aware(datetime.combine(end_date, time.min), timezone=tz),
+    )
+
+
+def date_range(start_date, end_date):
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days)]
+
+
+def template_blocks(staff_ids, start_date, end_date):
+    """Expand recurring templates into ``(staff_id, date, start, end, template_id)`` blocks.
+
+    Uses one query for templates and one for their exceptions, so nothing has
+    to be materialised as ``StaffSchedule`` rows ahead of time.
+    """
+    templates = list(
+        StaffScheduleTemplate.objects.active_between(start_date, end_date).filter(staff_id__in=staff_ids)
+    )
+    if not templates:
+        return []
+    skipped = {}
+    exceptions = StaffScheduleException.objects.filter(
+        template__in=templates,
+        exception_date__gte=start_date,
+        exception_date__lt=end_date,
+    ).values_list('template_id', 'exception_date')
+    for template_id, exception_date in exceptions:
+        skipped.setdefault(template_id, set()).add(exception_date)
+
+    return [
+        (template.staff_id, day, template.start_time, template.end_time, template.id)
+        for template in templates
+        for day in template.occurrences(start_date, end_date, skipped.get(template.id, ()))
+    ]
+
+
+def compute_free_masks(staff_ids, start_date, end_date):
+    """Free-slot bitmasks for every (staff_id, date) in [start_date, end_date).
+
+    Runs a fixed number of queries (schedule blocks, recurring templates and
+    their exceptions, booked appointments) no matter how many staff members or
+    days are requested.
+    """
+    staff_ids = list(staff_ids)
+    masks = {(staff_id, day): 0 for staff_id in staff_ids for day in date_range(start_date, end_date)}
+    if not masks:
+        return masks
+
+    schedules = StaffSchedule.objects.filter(
+        staff_id__in=staff_ids,
+        schedule_date__gte=start_date,
+        schedule_date__lt=end_date,
+        is_available=True,
+    ).values_list('staff_id', 'schedule_date', 'start_time', 'end_time')
+    for staff_id, schedule_date, start_time, end_time in schedules:
+        masks[(staff_id, schedule_date)] |= block_mask(start_time, end_time)
+    for staff_id, schedule_date, start_time, end_time, _ in template_blocks(staff_ids, start_date, end_date):
+        masks[(staff_id, schedule_date)] |= block_mask(start_time, end_time)
+
+    tz = timezone.get_current_timezone()
+    range_start, range_end = day_bounds(start_date, end_date, tz)
+    booked = Appointment.objects.filter(
+        staff_id__in=staff_ids,
+        appointment_datetime__gte=range_start,
+        appointment_datetime__lt=range_end,
+        status='BOOKED',
+    ).values_list('staff_id', 'appointment_datetime', 'duration_minutes')
+    for staff_id, appointment_datetime, duration_minutes in booked:
+        local_start = timezone.localtime(appointment_datetime, tz)
+        key = (staff_id, local_start.date())
+        if key in masks:
+            masks[key] &= ~booking_mask(local_start, duration_minutes)
+    return masks
+
+
+def availability_generation(staff_id):
+    return f'{CACHE_PREFIX}:{staff_id}'
+
+
+def invalidate_staff(staff_id):
+    """Drop every cached day for a staff member by bumping its generation."""
+    caching.invalidate(availability_generation(staff_id))
+
+
+def free_masks(staff_ids, start_date, end_date):
+    """Cached variant of :func:`compute_free_masks`."""
+    staff_ids = list(staff_ids)
+    generations = dict(
+        zip(staff_ids, caching.generations(availability_generation(staff_id) for staff_id in staff_ids))
+    )
+    keys = {
+        (staff_id, day): f'{CACHE_PREFIX}:{staff_id}:{generations[staff_id]}:{day.isoformat()}'
+        for staff_id in staff_ids
+        for day in date_range(start_date, end_date)
+    }
+    cached = cache.get_many(list(keys.values()))
+    masks = {slot_key: cached[key] for slot_key, key in keys.items() if key in cached}
+
+    missing_staff = sorted({staff_id for (staff_id, _), key in keys.items() if key not in cached})
+    if missing_staff:
+        computed = compute_free_masks(missing_staff, start_date, end_date)
+        cache.set_many(
+            {keys[slot_key]: mask for slot_key, mask in computed.items() if slot_key not in masks},
+            timeout=settings.AVAILABILITY_CACHE_TIMEOUT,
+        )
+        for slot_key, mask in computed.items():
+            masks.setdefault(slot_key, mask)
+    return masks
+
+
+def future_mask(slot_date, mask, now=None):
+    """Clear slots that do not start strictly after ``now``."""
+    now = timezone.localtime(now or timezone.now())
+    today = now.date()
+    if slot_date < today:
+        return 0
+    if slot_date > today:
+        return mask
+    first_open = _minutes(now) // SLOT_MINUTES + 1
+    return mask & ~((1 << first_open) - 1)
+
+
+def mask_to_datetimes(slot_date, mask, tz=None):
+    tz = tz or timezone.get_current_timezone()
+    slots = []
+    while mask:
+        lowest = mask & -mask
+        minute = (lowest.bit_length() - 1) * SLOT_MINUTES
+        slots.append(
+            timezone.make_aware(
+                datetime.combine(slot_date, time(minute // 60, minute % 60)),
+                timezone=tz,
+            )
+        )
+        mask ^= lowest
+    return slots
+
+
+def generate_available_slots(staff, slot_date, duration_minutes=SLOT_MINUTES):
+    """Aware start datetimes at which a staff member is free for ``duration_minutes``."""
+    staff_id = getattr(staff, 'pk', staff)
+    mask = free_masks([staff_id], slot_date, slot_date + timedelta(days=1))[(staff_id, slot_date)]
+    return mask_to_datetimes(slot_date, future_mask(slot_date, fit_mask(mask, duration_minutes)))
+
+
+def daily_slot_counts(staff_id, start_date, end_date, duration_minutes=SLOT_MINUTES):
+    """Number of bookable start slots per day in [start_date, end_date) for one staff member."""
+    masks = free_masks([staff_id], start_date, end_date)
+    now = timezone.now()
+    return {
+        day: future_mask(day, fit_mask(masks[(staff_id, day)], duration_minutes), now).bit_count()
+        for day in date_range(start_date, end_date)
+    }
+
+
+def earliest_available_slots(staff_ids, start_date, end_date, limit, duration_minutes=SLOT_MINUTES):
+    """First ``limit`` bookable starts across staff as ``(start, staff_id)`` pairs.
+
+    Each staff member's free slots are already sorted, so a k-way merge only
+    materialises the slots it actually returns.
+    """
+    staff_ids = list(staff_ids)
+    masks = free_masks(staff_ids, start_date, end_date)
+    days = date_range(start_date, end_date)
+    now = timezone.now()
+
+    def staff_slots(staff_id):
+        for day in days:
+            mask = fit_mask(masks[(staff_id, day)], duration_minutes)
+            for slot in mask_to_datetimes(day, future_mask(day, mask, now)):
+                yield slot, staff_id
+
+    return list(islice(heapq.merge(*(staff_slots(staff_id) for staff_id in staff_ids)), limit))
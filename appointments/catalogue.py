@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+
+
+class ServiceInfo(NamedTuple):
+    code: str
+    name: str
+    price: object
+    duration_minutes: int
+    is_active: bool
+    # ``None`` means any staff member can perform the service.
+    staff_ids: frozenset | None
+
+    def allows(self, staff_id):
+        return self.staff_ids is None or staff_id in self.staff_ids
+
+
+_lock = threading.Lock()
+_table = None
+_expires_at = 0.0
+
+
+def load_catalogue():
+    """Read every service and its staff restriction with two queries."""
+    from .models import Service
+
+    staff_ids = {}
+    for service_id, staff_id in Service.staff.through.objects.values_list('service_id', 'user_id'):
+        staff_ids.setdefault(service_id, set()).add(staff_id)
+    return {
+        row['code']: ServiceInfo(
+            code=row['code'],
+            name=row['name'],
+            price=row['price'],
+            duration_minutes=row['duration_minutes'],
+            is_active=row['is_active'],
+            staff_ids=frozenset(staff_ids[row['id']]) if row['id'] in staff_ids else None,
+        )
+        for row in Service.objects.values('id', 'code', 'name', 'price', 'duration_minutes', 'is_active')
+    }
+
+
+def catalogue():
+    """The service lookup table, cached in-process for ``SERVICE_CATALOGUE_TTL`` seconds.
+
+    Edits made in this process invalidate it immediately; other workers pick
+    them up when their copy expires.
+    """
+    global _table, _expires_at
+    table = _table
+    if table is not None and time.monotonic() < _expires_at:
+        return table
+    with _lock:
+        if _table is None or time.monotonic() >= _expires_at:
+            _table = load_catalogue()
+            _expires_at = time.monotonic() + settings.SERVICE_CATALOGUE_TTL
+        return _table
+
+
+def _clear():
+    global _table
+    _table = None
+
+
+def invalidate_catalogue():
+    # Cleared again on commit so a reload racing the write cannot keep stale rows.
+    _clear()
+    transaction.on_commit(_clear)
+
+
+def get_service(code):
+    return catalogue().get(code)
+
+
+def active_services():
+    return [service for service in catalogue().values() if service.is_active]
+
+
+def service_name(code):
+    service = get_service(code)
+    return service.name if service else code
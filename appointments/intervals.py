@@ -0,0 +1,27 @@
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching ``(start, end)`` pairs into sorted, disjoint ones."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def overlaps(intervals, start, end):
+    """Whether [start, end) overlaps any of the sorted, disjoint ``(start, end)`` ``intervals``."""
+    # Intervals starting before ``end``; only the last of them can still be open at ``start``.
+    index = bisect_left(intervals, end, key=itemgetter(0))
+    return index > 0 and intervals[index - 1][1] > start
+
+
+def covers(intervals, start, end):
+    """Whether one of the sorted, disjoint ``intervals`` contains all of [start, end)."""
+    index = bisect_right(intervals, start, key=itemgetter(0)) - 1
+    return index >= 0 and intervals[index][1] >= end
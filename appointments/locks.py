@@ -0,0 +1,32 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+# Backends without SELECT ... FOR UPDATE (SQLite) fall back to serialising
+# writers inside this process; SQLite only allows one writer at a time anyway.
+_process_lock = threading.RLock()
+
+
+@contextmanager
+def staff_transaction(staff_ids):
+    """Open a transaction holding a write lock on the given staff members.
+
+    Used for read-modify-write sequences such as merging schedule blocks, so
+    two requests for the same staff member cannot interleave.
+    """
+    staff_ids = sorted(set(staff_ids))
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            list(
+                get_user_model()
+                .objects.select_for_update()
+                .filter(pk__in=staff_ids)
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            yield
+    else:
+        with _process_lock, transaction.atomic():
+            yield
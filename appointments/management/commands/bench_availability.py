@@ -0,0 +1,103 @@
+import time as perf
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.availability import generate_available_slots
+from appointments.models import Appointment, StaffSchedule
+
+
+def legacy_generate_available_slots(staff, slot_date):
+    # The pre-engine implementation, kept here only as the benchmark baseline.
+    schedules = StaffSchedule.objects.filter(
+        staff=staff,
+        schedule_date=slot_date,
+        is_available=True,
+    ).order_by('start_time')
+    booked_times = set(
+        Appointment.objects.filter(
+            staff=staff,
+            appointment_datetime__date=slot_date,
+            status='BOOKED',
+        ).values_list('appointment_datetime', flat=True)
+    )
+
+    available = []
+    tz = timezone.get_current_timezone()
+    for schedule in schedules:
+        start_dt = timezone.make_aware(datetime.combine(slot_date, schedule.start_time), timezone=tz)
+        end_dt = timezone.make_aware(datetime.combine(slot_date, schedule.end_time), timezone=tz)
+        cursor = start_dt
+        while cursor + timedelta(minutes=30) <= end_dt:
+            if cursor not in booked_times and cursor > timezone.now():
+                available.append(cursor)
+            cursor += timedelta(minutes=30)
+    return available
+
+
+class Command(BaseCommand):
+    help = 'Compare the availability engine against the legacy slot generator on busy days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            staff, days = self._seed(options['days'])
+            self._run('legacy', legacy_generate_available_slots, staff, days, options['iterations'])
+            self._run('engine (cold)', generate_available_slots, staff, days, options['iterations'], cold=True)
+            self._run('engine (warm)', generate_available_slots, staff, days, options['iterations'])
+            transaction.set_rollback(True)
+
+    def _seed(self, day_count):
+        staff = User.objects.create_user(username='bench_availability_staff', role='STAFF')
+        customer = User.objects.create_user(username='bench_availability_customer', role='CUSTOMER')
+        tz = timezone.get_current_timezone()
+        first_day = timezone.localdate() + timedelta(days=1)
+        days = [first_day + timedelta(days=offset) for offset in range(day_count)]
+
+        schedules = []
+        appointments = []
+        for day in days:
+            # Overlapping blocks on purpose: the legacy generator walks each one.
+            for start_hour, end_hour in [(8, 14), (12, 18), (17, 22)]:
+                schedules.append(
+                    StaffSchedule(staff=staff, schedule_date=day, start_time=time(start_hour), end_time=time(end_hour))
+                )
+            for slot in range(16, 44, 2):
+                slot_dt = timezone.make_aware(datetime.combine(day, time(slot // 2, (slot % 2) * 30)), timezone=tz)
+                appointments.append(
+                    Appointment(
+                        customer=customer,
+                        staff=staff,
+                        service='HAIRCUT',
+                        stylist_name=staff.username,
+                        appointment_datetime=slot_dt,
+                    )
+                )
+        StaffSchedule.objects.bulk_create(schedules)
+        Appointment.objects.bulk_create(appointments)
+        return staff, days
+
+    def _run(self, label, generator, staff, days, iterations, cold=False):
+        calls = 0
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(iterations):
+                for day in days:
+                    if cold:
+                        cache.clear()
+                    started = perf.perf_counter()
+                    generator(staff, day)
+                    elapsed += perf.perf_counter() - started
+                    calls += 1
+        self.stdout.write(
+            f'{label:<15} {elapsed / calls * 1e6:10.1f} us/call '
+            f'{len(queries) / calls:6.2f} queries/call ({calls} calls)'
+        )
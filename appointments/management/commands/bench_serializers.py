@@ -0,0 +1,79 @@
+import time as perf
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.catalogue import catalogue
+from appointments.models import Appointment
+from appointments.serializers import AppointmentRowSerializer, AppointmentSerializer
+from payments.models import Payment
+from payments.serializers import PaymentRowSerializer, PaymentSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of the model serializers and the values() fast path for listings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(max(options['rows']))
+            appointments = Appointment.objects.select_related('customer', 'staff').order_by('id')
+            payments = Payment.objects.select_related('appointment', 'appointment__customer').order_by('id')
+            for rows in options['rows']:
+                self._run(
+                    'appointments',
+                    rows,
+                    lambda: AppointmentSerializer(appointments[:rows], many=True).data,
+                    lambda: AppointmentRowSerializer(AppointmentRowSerializer.values(appointments[:rows])).data,
+                )
+                self._run(
+                    'payments',
+                    rows,
+                    lambda: PaymentSerializer(payments[:rows], many=True).data,
+                    lambda: PaymentRowSerializer(PaymentRowSerializer.values(payments[:rows])).data,
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        staff = User.objects.create_user(username='bench_serializers_staff', role='STAFF')
+        customer = User.objects.create_user(username='bench_serializers_customer', role='CUSTOMER')
+        start = timezone.now().replace(second=0, microsecond=0) + timedelta(days=1)
+        services = sorted(catalogue()) or ['HAIRCUT']
+        # bulk_create skips save(), so search text and rollups are not maintained; the
+        # surrounding transaction is rolled back anyway.
+        appointments = Appointment.objects.bulk_create(
+            [
+                Appointment(
+                    customer=customer,
+                    staff=staff if index % 3 else None,
+                    service=services[index % len(services)],
+                    stylist_name='Bench',
+                    appointment_datetime=start + timedelta(minutes=30 * index),
+                    notes=f'Benchmark appointment {index}',
+                )
+                for index in range(count)
+            ],
+            batch_size=2000,
+        )
+        Payment.objects.bulk_create(
+            [Payment(appointment=appointment, amount=20) for appointment in appointments],
+            batch_size=2000,
+        )
+
+    def _run(self, label, rows, slow, fast):
+        results = []
+        for name, serialize in (('serializer', slow), ('values', fast)):
+            started = perf.perf_counter()
+            data = serialize()
+            elapsed = perf.perf_counter() - started
+            results.append((name, len(data) / elapsed if elapsed else 0.0))
+        self.stdout.write(
+            f'{label:<13} {rows:>7} rows  '
+            + '  '.join(f'{name} {rate:>10.0f} rows/s' for name, rate in results)
+            + f'  speedup x{results[1][1] / results[0][1]:.1f}'
+        )
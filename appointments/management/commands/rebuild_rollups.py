@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from appointments.models import DailyAppointmentRollup
+from appointments.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily appointment rollups from appointments and payments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuild_rollups(batch_size=options['batch_size'])
+        self.stdout.write(f'Rebuilt {DailyAppointmentRollup.objects.count()} rollup rows.')
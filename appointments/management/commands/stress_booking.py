@@ -0,0 +1,88 @@
+import threading
+import time as perf
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import Appointment, Service, StaffSchedule
+from appointments.services import SlotUnavailable, book_appointment
+
+
+def run_booking_stress(threads=8, rounds=20):
+    """Let ``threads`` customers race for the same slot ``rounds`` times.
+
+    Each round releases every thread at once through a barrier; exactly one
+    booking must win and every other attempt must end as a ``SlotUnavailable``
+    conflict. The winner is cancelled before the next round.
+    """
+    suffix = f'{threading.get_ident()}_{perf.monotonic_ns()}'
+    staff = User.objects.create_user(username=f'stress_staff_{suffix}', role='STAFF')
+    customers = [
+        User.objects.create_user(username=f'stress_customer_{suffix}_{index}', role='CUSTOMER')
+        for index in range(threads)
+    ]
+    service = Service.objects.create(code=f'STRESS{staff.pk}', name='Stress test', price=20)
+    slot_date = timezone.localdate() + timedelta(days=1)
+    StaffSchedule.objects.create(staff=staff, schedule_date=slot_date, start_time=time(10), end_time=time(11))
+    slot_dt = timezone.make_aware(datetime.combine(slot_date, time(10)))
+
+    stats = {'booked': 0, 'conflicts': 0, 'errors': 0, 'double_booked_rounds': 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads + 1)
+
+    def attempt(customer):
+        for _ in range(rounds):
+            barrier.wait()
+            try:
+                book_appointment(customer, staff, service.code, slot_dt)
+                outcome = 'booked'
+            except SlotUnavailable:
+                outcome = 'conflicts'
+            except DatabaseError:
+                outcome = 'errors'
+            with lock:
+                stats[outcome] += 1
+            barrier.wait()
+        connection.close()
+
+    workers = [threading.Thread(target=attempt, args=(customer,)) for customer in customers]
+    for worker in workers:
+        worker.start()
+
+    started = perf.perf_counter()
+    for _ in range(rounds):
+        barrier.wait()
+        barrier.wait()
+        booked = Appointment.objects.filter(staff=staff, appointment_datetime=slot_dt, status='BOOKED')
+        if booked.count() > 1:
+            stats['double_booked_rounds'] += 1
+        booked.update(status='CANCELLED')
+    elapsed = perf.perf_counter() - started
+    for worker in workers:
+        worker.join()
+
+    User.objects.filter(pk__in=[staff.pk, *[customer.pk for customer in customers]]).delete()
+    service.delete()
+    stats['attempts'] = threads * rounds
+    stats['seconds'] = elapsed
+    stats['attempts_per_second'] = stats['attempts'] / elapsed if elapsed else 0.0
+    return stats
+
+
+class Command(BaseCommand):
+    help = 'Hammer one appointment slot from many threads and report throughput and conflict handling.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def handle(self, *args, **options):
+        stats = run_booking_stress(options['threads'], options['rounds'])
+        self.stdout.write(
+            f"attempts={stats['attempts']} booked={stats['booked']} conflicts={stats['conflicts']} "
+            f"errors={stats['errors']} double_booked_rounds={stats['double_booked_rounds']} "
+            f"throughput={stats['attempts_per_second']:.1f} attempts/s"
+        )
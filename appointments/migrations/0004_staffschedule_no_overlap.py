@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:45
+
+from django.db import migrations
+
+EXCLUSION_SQL = (
+    'ALTER TABLE appointments_staffschedule '
+    'ADD CONSTRAINT staff_schedule_no_overlap '
+    'EXCLUDE USING gist ('
+    'staff_id WITH =, '
+    'tsrange(schedule_date + start_time, schedule_date + end_time) WITH &&'
+    ') WHERE (is_available)'
+)
+
+
+def merge_overlapping_blocks(apps, schema_editor):
+    StaffSchedule = apps.get_model('appointments', 'StaffSchedule')
+    blocks = StaffSchedule.objects.filter(is_available=True).order_by('staff_id', 'schedule_date', 'start_time')
+    current = None
+    absorbed = []
+    for block in blocks.iterator():
+        if (
+            current
+            and (current.staff_id, current.schedule_date) == (block.staff_id, block.schedule_date)
+            and block.start_time <= current.end_time
+        ):
+            if block.end_time > current.end_time:
+                current.end_time = block.end_time
+                current.save(update_fields=['end_time'])
+            absorbed.append(block.pk)
+        else:
+            current = block
+    StaffSchedule.objects.filter(pk__in=absorbed).delete()
+
+
+def add_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(EXCLUSION_SQL)
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE appointments_staffschedule DROP CONSTRAINT IF EXISTS staff_schedule_no_overlap')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_staffscheduletemplate_staffscheduleexception'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_overlapping_blocks, migrations.RunPython.noop),
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
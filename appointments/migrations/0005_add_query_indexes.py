@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_staffschedule_no_overlap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['staff', 'appointment_datetime', 'status'], name='appt_staff_dt_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['customer', 'appointment_datetime'], name='appt_customer_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffschedule',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['staff', 'schedule_date'], name='schedule_staff_date_avail_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:41
+
+from django.db import migrations, models
+
+# Copied from appointments.search as of this migration, so later changes there cannot alter its history.
+APPOINTMENT_TABLE = 'appointments_appointment'
+FTS_TABLE = 'appointments_appointment_fts'
+SQLITE_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"search_text, content='{APPOINTMENT_TABLE}', content_rowid='id', tokenize='trigram')",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {APPOINTMENT_TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {APPOINTMENT_TABLE} BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON {APPOINTMENT_TABLE} BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END',
+)
+POSTGRESQL_INDEX_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS appt_search_trgm_idx ON {APPOINTMENT_TABLE} '
+    'USING gin (search_text gin_trgm_ops)',
+)
+
+
+def search_document(*parts):
+    return ' '.join(part for part in parts if part).lower()
+
+
+def backfill_search_text(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    rows = Appointment.objects.select_related('customer', 'staff').order_by('pk')
+    batch = []
+    for appointment in rows.iterator(chunk_size=500):
+        appointment.search_text = search_document(
+            appointment.customer.username,
+            appointment.staff.username if appointment.staff_id else '',
+            appointment.stylist_name,
+            appointment.service,
+            appointment.notes,
+        )
+        batch.append(appointment)
+        if len(batch) >= 500:
+            Appointment.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Appointment.objects.bulk_update(batch, ['search_text'])
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for statement in {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRESQL_INDEX_SQL}.get(vendor, ()):
+        schema_editor.execute(statement)
+    if vendor == 'sqlite':
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS appt_search_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:45
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Copied from appointments.rollups as of this migration, so later changes there cannot alter its history.
+PAYMENT_COUNTERS = {
+    'PENDING': ('pending_payments', 'pending_amount'),
+    'REQUESTED': ('requested_payments', 'requested_amount'),
+    'PAID': ('paid_payments', 'paid_amount'),
+    'FAILED': ('failed_payments', 'failed_amount'),
+}
+
+
+def backfill_rollups(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    DailyAppointmentRollup = apps.get_model('appointments', 'DailyAppointmentRollup')
+    counters = {'appointment_count': Count('id')}
+    for status, (count_field, amount_field) in PAYMENT_COUNTERS.items():
+        paid_in_status = Q(payment__status=status)
+        counters[count_field] = Count('payment', filter=paid_in_status)
+        counters[amount_field] = Sum('payment__amount', filter=paid_in_status, default=Decimal('0'))
+    rows = (
+        Appointment.objects.annotate(date=TruncDate('appointment_datetime', tzinfo=timezone.get_current_timezone()))
+        .values('date', 'staff_id', 'service', 'status')
+        .annotate(**counters)
+        .order_by()
+    )
+    DailyAppointmentRollup.objects.bulk_create([DailyAppointmentRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_appointment_search_index'),
+        ('payments', '0003_add_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAppointmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('service', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('appointment_count', models.IntegerField(default=0)),
+                ('pending_payments', models.IntegerField(default=0)),
+                ('requested_payments', models.IntegerField(default=0)),
+                ('paid_payments', models.IntegerField(default=0)),
+                ('failed_payments', models.IntegerField(default=0)),
+                ('pending_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('requested_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('failed_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('staff', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='appointment_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date', 'staff', 'service', 'status'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('staff__isnull', False)), fields=('date', 'staff', 'service', 'status'), name='unique_rollup_staff_day'), models.UniqueConstraint(condition=models.Q(('staff__isnull', True)), fields=('date', 'service', 'status'), name='unique_rollup_unassigned_day')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
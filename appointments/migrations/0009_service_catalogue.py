@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+# The services and prices that used to be hard-coded on Appointment.
+SERVICES = (
+    ('HAIRCUT', 'Haircut', 20),
+    ('FACIAL', 'Facial', 35),
+    ('MANICURE', 'Manicure', 25),
+    ('PEDICURE', 'Pedicure', 30),
+)
+
+
+def seed_services(apps, schema_editor):
+    Service = apps.get_model('appointments', 'Service')
+    for code, name, price in SERVICES:
+        Service.objects.get_or_create(code=code, defaults={'name': name, 'price': price, 'duration_minutes': 30})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_dailyappointmentrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='appointment',
+            name='service',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Service',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('duration_minutes', models.PositiveIntegerField(default=30)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('staff', models.ManyToManyField(blank=True, limit_choices_to={'role': 'STAFF'}, related_name='services', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(seed_services, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 12:00
+
+import appointments.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0010_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='service',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=30, validators=[appointments.models.validate_service_duration]),
+        ),
+    ]
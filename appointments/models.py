@@ -1,8 +1,19 @@
+from datetime import datetime, time, timedelta
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from smartsalon_backend.conditional import with_updated_at
+
+from .catalogue import get_service, service_name
+from .intervals import covers, merge_intervals, overlaps
+from .locks import staff_transaction
+from .search import SEARCH_FIELDS, build_search_text
+
+SLOT_MINUTES = 30
+
 
 class StaffSchedule(models.Model):
     staff = models.ForeignKey(
@@ -15,6 +26,7 @@ class StaffSchedule(models.Model):
     end_time = models.TimeField()
     is_available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['schedule_date', 'start_time']
@@ -24,28 +36,188 @@ class StaffSchedule(models.Model):
                 name='unique_staff_schedule_block',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['staff', 'schedule_date'],
+                condition=models.Q(is_available=True),
+                name='schedule_staff_date_avail_idx',
+            ),
+        ]
+
+    def clean(self):
+        if self.staff and self.staff.role != 'STAFF':
+            raise ValidationError('Schedule can only be assigned to STAFF users.')
+        if self.start_time >= self.end_time:
+            raise ValidationError('Schedule end time must be after start time.')
+
+    def save(self, *args, **kwargs):
+        self.clean_fields()
+        self.clean()
+        kwargs['update_fields'] = with_updated_at(kwargs.get('update_fields'))
+        with staff_transaction([self.staff_id]):
+            if self.is_available:
+                self.absorb_overlapping_blocks()
+            self.validate_constraints()
+            super().save(*args, **kwargs)
+
+    def absorb_overlapping_blocks(self):
+        """Widen this block over available blocks it overlaps or touches and delete those."""
+        neighbours = StaffSchedule.objects.filter(
+            staff_id=self.staff_id,
+            schedule_date=self.schedule_date,
+            is_available=True,
+            start_time__lte=self.end_time,
+            end_time__gte=self.start_time,
+        )
+        if self.pk:
+            neighbours = neighbours.exclude(pk=self.pk)
+        blocks = list(neighbours.values_list('pk', 'start_time', 'end_time'))
+        if not blocks:
+            return
+        self.start_time = min(self.start_time, *(start for _, start, _ in blocks))
+        self.end_time = max(self.end_time, *(end for _, _, end in blocks))
+        StaffSchedule.objects.filter(pk__in=[pk for pk, _, _ in blocks]).delete()
+
+    def __str__(self):
+        return f'{self.staff.username} - {self.schedule_date} ({self.start_time}-{self.end_time})'
+
+
+class StaffScheduleTemplateQuerySet(models.QuerySet):
+    def active_between(self, start_date, end_date):
+        """Templates that can produce blocks on some date in [start_date, end_date)."""
+        return self.filter(valid_from__lt=end_date).filter(
+            models.Q(valid_until__isnull=True) | models.Q(valid_until__gte=start_date)
+        )
+
+    def on_date(self, staff, slot_date):
+        return (
+            self.active_between(slot_date, slot_date + timedelta(days=1))
+            .annotate(weekday_bit=models.F('weekdays').bitand(1 << slot_date.weekday()))
+            .filter(staff=staff, weekday_bit__gt=0)
+            .exclude(exceptions__exception_date=slot_date)
+        )
+
+
+class StaffScheduleTemplate(models.Model):
+    WEEKDAY_CHOICES = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+
+    staff = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='schedule_templates',
+    )
+    # Bit N set means the block repeats on weekday N (0 = Monday).
+    weekdays = models.PositiveSmallIntegerField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = StaffScheduleTemplateQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['staff', 'start_time']
 
     def clean(self):
         if self.staff and self.staff.role != 'STAFF':
             raise ValidationError('Schedule can only be assigned to STAFF users.')
         if self.start_time >= self.end_time:
             raise ValidationError('Schedule end time must be after start time.')
+        if not self.weekdays or self.weekdays >= 1 << 7:
+            raise ValidationError('Select at least one valid weekday.')
+        if self.valid_until and self.valid_until < self.valid_from:
+            raise ValidationError('Template end date must be on or after its start date.')
 
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
 
+    @property
+    def weekday_list(self):
+        return [day for day, _ in self.WEEKDAY_CHOICES if self.weekdays >> day & 1]
+
+    def occurrences(self, start_date, end_date, skipped_dates=()):
+        """Dates in [start_date, end_date) on which this template produces a block."""
+        day = max(start_date, self.valid_from)
+        last = min(end_date, self.valid_until + timedelta(days=1)) if self.valid_until else end_date
+        while day < last:
+            if self.weekdays >> day.weekday() & 1 and day not in skipped_dates:
+                yield day
+            day += timedelta(days=1)
+
     def __str__(self):
-        return f'{self.staff.username} - {self.schedule_date} ({self.start_time}-{self.end_time})'
+        days = ', '.join(dict(self.WEEKDAY_CHOICES)[day][:3] for day in self.weekday_list)
+        return f'{self.staff.username} - {days} ({self.start_time}-{self.end_time})'
 
 
-class Appointment(models.Model):
-    SERVICE_CHOICES = (
-        ('HAIRCUT', 'Haircut'),
-        ('FACIAL', 'Facial'),
-        ('MANICURE', 'Manicure'),
-        ('PEDICURE', 'Pedicure'),
+class StaffScheduleException(models.Model):
+    template = models.ForeignKey(
+        StaffScheduleTemplate,
+        on_delete=models.CASCADE,
+        related_name='exceptions',
     )
+    exception_date = models.DateField()
+    reason = models.CharField(max_length=120, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['exception_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['template', 'exception_date'],
+                name='unique_schedule_template_exception',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.template} skipped on {self.exception_date}'
+
+
+ROLLUP_FIELDS = {'appointment_datetime', 'staff_id', 'service', 'status'}
+
+
+def appointment_rollup_key(appointment_datetime, staff_id, service, status):
+    return (timezone.localtime(appointment_datetime).date(), staff_id, service, status)
+
+
+def validate_service_duration(value):
+    if not value or value % SLOT_MINUTES or value > 24 * 60:
+        raise ValidationError(f'Duration must be a multiple of {SLOT_MINUTES} minutes within one day.')
+
+
+class Service(models.Model):
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    # Checked by full_clean and by ModelSerializer, which copies model field validators.
+    duration_minutes = models.PositiveIntegerField(default=SLOT_MINUTES, validators=[validate_service_duration])
+    # Empty means any staff member can perform the service.
+    staff = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        related_name='services',
+        blank=True,
+        limit_choices_to={'role': 'STAFF'},
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f'{self.name} ({self.duration_minutes} min)'
+
+
+class Appointment(models.Model):
     STATUS_CHOICES = (
         ('BOOKED', 'Booked'),
         ('CANCELLED', 'Cancelled'),
@@ -64,13 +236,16 @@ class Appointment(models.Model):
         null=True,
         blank=True,
     )
-    service = models.CharField(max_length=20, choices=SERVICE_CHOICES)
+    # Code of a ``Service``; kept as plain text so history survives catalogue edits.
+    service = models.CharField(max_length=20)
     stylist_name = models.CharField(max_length=100, blank=True)
     appointment_datetime = models.DateTimeField()
-    duration_minutes = models.PositiveIntegerField(default=30)
+    duration_minutes = models.PositiveIntegerField(default=SLOT_MINUTES)
     notes = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='BOOKED')
+    search_text = models.TextField(blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['appointment_datetime']
@@ -81,49 +256,147 @@ class Appointment(models.Model):
                 name='unique_staff_appointment_slot_when_booked',
             )
         ]
+        indexes = [
+            models.Index(fields=['staff', 'appointment_datetime', 'status'], name='appt_staff_dt_status_idx'),
+            models.Index(fields=['customer', 'appointment_datetime', 'id'], name='appt_customer_dt_id_idx'),
+            models.Index(fields=['appointment_datetime', 'id'], name='appt_dt_id_idx'),
+            models.Index(fields=['updated_at'], name='appt_updated_idx'),
+        ]
 
     def clean(self):
         if not self.appointment_datetime:
             return
         if self.appointment_datetime <= timezone.now():
             raise ValidationError('Appointment time must be in the future.')
-        if self.appointment_datetime.minute not in [0, 30] or self.appointment_datetime.second != 0:
-            raise ValidationError('Appointments must be booked on 30-minute slots.')
-        if self.duration_minutes != 30:
-            raise ValidationError('Each appointment must be 30 minutes.')
+        if self.appointment_datetime.minute % SLOT_MINUTES or self.appointment_datetime.second:
+            raise ValidationError(f'Appointments must be booked on {SLOT_MINUTES}-minute slots.')
+        if not self.duration_minutes or self.duration_minutes % SLOT_MINUTES:
+            raise ValidationError(f'Appointment duration must be a multiple of {SLOT_MINUTES} minutes.')
+        local_start = timezone.localtime(self.appointment_datetime)
+        local_end = local_start + timedelta(minutes=self.duration_minutes)
+        if local_end.date() != local_start.date():
+            raise ValidationError('Appointments must end on the day they start.')
         if self.staff and self.staff.role != 'STAFF':
             raise ValidationError('Appointment can only be assigned to STAFF users.')
+        service = get_service(self.service)
+        if self.staff and service and not service.allows(self.staff_id):
+            raise ValidationError('Selected staff does not perform this service.')
         if self.staff:
-            has_schedule = StaffSchedule.objects.filter(
-                staff=self.staff,
-                schedule_date=self.appointment_datetime.date(),
-                start_time__lte=self.appointment_datetime.time(),
-                end_time__gt=self.appointment_datetime.time(),
-                is_available=True,
-            ).exists()
-            if not has_schedule:
+            slot_date = local_start.date()
+            blocks = list(
+                StaffSchedule.objects.filter(
+                    staff=self.staff,
+                    schedule_date=slot_date,
+                    is_available=True,
+                ).values_list('start_time', 'end_time')
+            )
+            blocks += StaffScheduleTemplate.objects.on_date(self.staff, slot_date).values_list(
+                'start_time', 'end_time'
+            )
+            if not covers(merge_intervals(blocks), local_start.time(), local_end.time()):
                 raise ValidationError('Selected staff is not available in this slot.')
-            slot_taken = Appointment.objects.filter(
-                staff=self.staff,
-                appointment_datetime=self.appointment_datetime,
-                status='BOOKED',
-            ).exclude(pk=self.pk)
-            if slot_taken.exists():
+            if self.overlaps_booking():
                 raise ValidationError('Selected slot is already booked.')
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
+    def overlaps_booking(self):
+        """Whether another BOOKED appointment of the same staff member overlaps this one.
+
+        Appointments never cross midnight, so only the day's bookings are
+        loaded; they are merged into sorted intervals and probed by bisection
+        instead of comparing start timestamps.
+        """
+        local_start = timezone.localtime(self.appointment_datetime)
+        tz = local_start.tzinfo
+        day_start = timezone.make_aware(datetime.combine(local_start.date(), time.min), timezone=tz)
+        booked = (
+            Appointment.objects.filter(
+                staff_id=self.staff_id,
+                status='BOOKED',
+                appointment_datetime__gte=day_start,
+                appointment_datetime__lt=day_start + timedelta(days=1),
+            )
+            .exclude(pk=self.pk)
+            .values_list('appointment_datetime', 'duration_minutes')
+        )
+        intervals = merge_intervals((start, start + timedelta(minutes=duration)) for start, duration in booked)
+        return overlaps(
+            intervals,
+            self.appointment_datetime,
+            self.appointment_datetime + timedelta(minutes=self.duration_minutes),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & ROLLUP_FIELDS:
+            instance._rollup_key = instance.rollup_key()
+        return instance
+
+    def rollup_key(self):
+        return appointment_rollup_key(self.appointment_datetime, self.staff_id, self.service, self.status)
+
+    def save(self, *args, validate=True, **kwargs):
+        if validate:
+            self.full_clean()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or SEARCH_FIELDS.intersection(update_fields):
+            self.search_text = build_search_text(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'search_text'}
+        kwargs['update_fields'] = with_updated_at(kwargs.get('update_fields'))
+        # Daily rollups are updated by post_save handlers inside this transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def get_service_display(self):
+        return service_name(self.service)
 
     def get_service_price(self):
-        prices = {
-            'HAIRCUT': 20,
-            'FACIAL': 35,
-            'MANICURE': 25,
-            'PEDICURE': 30,
-        }
-        return prices.get(self.service, 0)
+        service = get_service(self.service)
+        return service.price if service else 0
 
     def __str__(self):
         staff_name = self.staff.username if self.staff else self.stylist_name
         return f'{self.customer.username} - {staff_name} - {self.appointment_datetime:%Y-%m-%d %H:%M}'
+
+
+class DailyAppointmentRollup(models.Model):
+    """Appointment and payment counters per local day, staff member, service and status."""
+
+    date = models.DateField()
+    staff = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='appointment_rollups',
+        null=True,
+        blank=True,
+    )
+    service = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    appointment_count = models.IntegerField(default=0)
+    pending_payments = models.IntegerField(default=0)
+    requested_payments = models.IntegerField(default=0)
+    paid_payments = models.IntegerField(default=0)
+    failed_payments = models.IntegerField(default=0)
+    pending_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    requested_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    failed_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['date', 'staff', 'service', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'staff', 'service', 'status'],
+                condition=models.Q(staff__isnull=False),
+                name='unique_rollup_staff_day',
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'service', 'status'],
+                condition=models.Q(staff__isnull=True),
+                name='unique_rollup_unassigned_day',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.staff_id or "-"} {self.service} {self.status}: {self.appointment_count}'
@@ -0,0 +1,142 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from payments.models import Payment
+
+from .models import Appointment, DailyAppointmentRollup, appointment_rollup_key
+
+PAYMENT_COUNTERS = {
+    'PENDING': ('pending_payments', 'pending_amount'),
+    'REQUESTED': ('requested_payments', 'requested_amount'),
+    'PAID': ('paid_payments', 'paid_amount'),
+    'FAILED': ('failed_payments', 'failed_amount'),
+}
+
+
+def payment_deltas(status, amount, sign=1):
+    count_field, amount_field = PAYMENT_COUNTERS[status]
+    return {count_field: sign, amount_field: sign * Decimal(amount)}
+
+
+def apply_delta(key, deltas):
+    """Add ``deltas`` to the counters of one ``(date, staff_id, service, status)`` row."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    day, staff_id, service, status = key
+    rows = DailyAppointmentRollup.objects.filter(date=day, staff_id=staff_id, service=service, status=status)
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if rows.update(**changes):
+        return
+    if all(value < 0 for value in deltas.values()):
+        # Row already gone, e.g. removed by a staff member's cascade delete.
+        return
+    try:
+        with transaction.atomic():
+            DailyAppointmentRollup.objects.create(date=day, staff_id=staff_id, service=service, status=status, **deltas)
+    except IntegrityError:
+        rows.update(**changes)
+
+
+def _appointment_key(appointment_id):
+    row = (
+        Appointment.objects.filter(pk=appointment_id)
+        .values_list('appointment_datetime', 'staff_id', 'service', 'status')
+        .first()
+    )
+    return appointment_rollup_key(*row) if row else None
+
+
+def appointment_saved(appointment, previous_key):
+    key = appointment.rollup_key()
+    if key == previous_key:
+        return
+    deltas = Counter({'appointment_count': 1})
+    if previous_key is not None:
+        payment = Payment.objects.filter(appointment_id=appointment.pk).values_list('status', 'amount').first()
+        if payment:
+            deltas.update(payment_deltas(*payment))
+        apply_delta(previous_key, {field: -value for field, value in deltas.items()})
+    apply_delta(key, deltas)
+
+
+def appointment_deleted(appointment, key):
+    # A cascading delete removes the payment first and its own handler reverses it.
+    apply_delta(key, {'appointment_count': -1})
+
+
+def payment_saved(payment, previous_state):
+    state = payment.rollup_state()
+    if state == previous_state:
+        return
+    appointment = payment.appointment if Payment.appointment.is_cached(payment) else None
+    key = appointment.rollup_key() if appointment else _appointment_key(payment.appointment_id)
+    deltas = Counter(payment_deltas(payment.status, payment.amount))
+    if previous_state is not None:
+        previous_id, status, amount = previous_state
+        if previous_id == payment.appointment_id:
+            deltas.update(payment_deltas(status, amount, sign=-1))
+        else:
+            payment_deleted(previous_state)
+    if key is not None:
+        apply_delta(key, deltas)
+
+
+def payment_deleted(state):
+    appointment_id, status, amount = state
+    key = _appointment_key(appointment_id)
+    if key is not None:
+        apply_delta(key, payment_deltas(status, amount, sign=-1))
+
+
+def move_payments(payments, from_status, to_status):
+    """Apply a bulk status change of ``(appointment_id, amount)`` payments, one UPDATE per rollup row."""
+    payments = list(payments)
+    keys = {
+        appointment_id: appointment_rollup_key(*row)
+        for appointment_id, *row in Appointment.objects.filter(pk__in=[appointment_id for appointment_id, _ in payments])
+        .values_list('id', 'appointment_datetime', 'staff_id', 'service', 'status')
+    }
+    totals = {}
+    for appointment_id, amount in payments:
+        deltas = totals.setdefault(keys[appointment_id], Counter())
+        deltas.update(payment_deltas(from_status, amount, sign=-1))
+        deltas.update(payment_deltas(to_status, amount))
+    for key, deltas in totals.items():
+        apply_delta(key, deltas)
+
+
+def add_appointments(appointments):
+    """Count appointments inserted with ``bulk_create``, which skips signals."""
+    totals = Counter(appointment.rollup_key() for appointment in appointments)
+    for key, count in totals.items():
+        apply_delta(key, {'appointment_count': count})
+
+
+def rollup_rows(appointments):
+    """Aggregate an appointment queryset into rollup field dicts with one GROUP BY query."""
+    counters = {'appointment_count': Count('id')}
+    for status, (count_field, amount_field) in PAYMENT_COUNTERS.items():
+        paid_in_status = Q(payment__status=status)
+        counters[count_field] = Count('payment', filter=paid_in_status)
+        counters[amount_field] = Sum('payment__amount', filter=paid_in_status, default=Decimal('0'))
+    return (
+        appointments.annotate(date=TruncDate('appointment_datetime', tzinfo=timezone.get_current_timezone()))
+        .values('date', 'staff_id', 'service', 'status')
+        .annotate(**counters)
+        .order_by()
+    )
+
+
+def rebuild_rollups(batch_size=1000):
+    with transaction.atomic():
+        DailyAppointmentRollup.objects.all().delete()
+        DailyAppointmentRollup.objects.bulk_create(
+            [DailyAppointmentRollup(**row) for row in rollup_rows(Appointment.objects.all())],
+            batch_size=batch_size,
+        )
@@ -0,0 +1,112 @@
+from django.db import connections
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+APPOINTMENT_TABLE = 'appointments_appointment'
+FTS_TABLE = 'appointments_appointment_fts'
+# The FTS5 trigram tokenizer and pg_trgm cannot index terms shorter than this.
+MIN_INDEXED_TERM = 3
+
+SQLITE_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"search_text, content='{APPOINTMENT_TABLE}', content_rowid='id', tokenize='trigram')",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {APPOINTMENT_TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {APPOINTMENT_TABLE} BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON {APPOINTMENT_TABLE} BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END',
+)
+POSTGRESQL_INDEX_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS appt_search_trgm_idx ON {APPOINTMENT_TABLE} '
+    'USING gin (search_text gin_trgm_ops)',
+)
+
+SEARCH_FIELDS = {'customer', 'staff', 'stylist_name', 'service', 'notes'}
+
+
+def search_document(*parts):
+    return ' '.join(part for part in parts if part).lower()
+
+
+def build_search_text(appointment):
+    return search_document(
+        appointment.customer.username if appointment.customer_id else '',
+        appointment.staff.username if appointment.staff_id else '',
+        appointment.stylist_name,
+        appointment.service,
+        appointment.notes,
+    )
+
+
+def refresh_search_text(queryset, batch_size=500):
+    """Rebuild ``search_text`` for the given appointments, e.g. after a username change."""
+    batch = []
+    for appointment in queryset.select_related('customer', 'staff').iterator(chunk_size=batch_size):
+        appointment.search_text = build_search_text(appointment)
+        batch.append(appointment)
+        if len(batch) >= batch_size:
+            queryset.model.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        queryset.model.objects.bulk_update(batch, ['search_text'])
+
+
+def install_search_index(connection):
+    """Create the vendor-specific index over ``search_text``; safe to run repeatedly.
+
+    On SQLite the FTS5 table is kept in sync by triggers. Table rebuilds done by
+    later schema migrations drop those triggers, so this also runs after every
+    ``migrate``.
+    """
+    statements = {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRESQL_INDEX_SQL}.get(connection.vendor, ())
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def rebuild_search_index(connection):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def search_appointments(queryset, term):
+    """Filter appointments matching every word of ``term``, annotated with ``search_rank``.
+
+    Higher ranks are better matches. Words too short for the index fall back to
+    a plain substring filter on the already narrowed rows.
+    """
+    words = term.lower().split()
+    if not words:
+        return queryset
+    indexed = [word for word in words if len(word) >= MIN_INDEXED_TERM]
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'sqlite' and indexed:
+        match = ' AND '.join('"{}"'.format(word.replace('"', '""')) for word in indexed)
+        queryset = queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = {APPOINTMENT_TABLE}.id',
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+        remaining = [word for word in words if word not in indexed]
+    else:
+        remaining = words
+        if vendor == 'postgresql':
+            rank = Func(Value(' '.join(words)), F('search_text'), function='word_similarity', output_field=FloatField())
+        else:
+            rank = Value(0.0, output_field=FloatField())
+        queryset = queryset.annotate(search_rank=rank)
+
+    condition = Q()
+    for word in remaining:
+        condition &= Q(search_text__contains=word)
+    return queryset.filter(condition)
@@ -1,19 +1,51 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from itertools import islice
 
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Appointment, StaffSchedule
+from smartsalon_backend.serializers import ValuesSerializer
+
+from .catalogue import get_service, service_name
+from .intervals import merge_intervals
+from .models import SLOT_MINUTES, Appointment, Service, StaffSchedule, StaffScheduleException, StaffScheduleTemplate
+from .services import book_appointment, bulk_create_schedules, slot_is_open
 
 User = get_user_model()
 
 
+def active_service(code):
+    service = get_service(code)
+    if service is None or not service.is_active:
+        raise serializers.ValidationError('Select a valid service.')
+    return service
+
+
+class ServiceSerializer(serializers.ModelSerializer):
+    staff = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role='STAFF'),
+        many=True,
+        required=False,
+        help_text='Staff members who perform the service; empty means anyone.',
+    )
+
+    class Meta:
+        model = Service
+        fields = ['id', 'code', 'name', 'price', 'duration_minutes', 'staff', 'is_active', 'created_at']
+        read_only_fields = ['created_at']
+
+
 class AppointmentSerializer(serializers.ModelSerializer):
     customer_username = serializers.CharField(source='customer.username', read_only=True)
     staff_username = serializers.CharField(source='staff.username', read_only=True)
     service_display = serializers.CharField(source='get_service_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    staff = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(role='STAFF'),
+        required=False,
+        allow_null=True,
+    )
 
     class Meta:
         model = Appointment
@@ -34,39 +66,72 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'created_at',
         ]
         read_only_fields = ['customer', 'status', 'created_at', 'duration_minutes', 'stylist_name']
+        # The partial unique constraint is enforced by the database on insert; see book_appointment.
+        validators = []
+
+    def validate_service(self, value):
+        active_service(value)
+        return value
 
     def validate_appointment_datetime(self, value):
         if value <= timezone.now():
             raise serializers.ValidationError('Appointment time must be in the future.')
+        if value.minute % SLOT_MINUTES or value.second or value.microsecond:
+            raise serializers.ValidationError(f'Appointments must be booked on {SLOT_MINUTES}-minute slots.')
         return value
 
     def validate(self, attrs):
         staff = attrs.get('staff')
         appointment_datetime = attrs.get('appointment_datetime')
-        instance = self.instance
 
         if not staff:
             raise serializers.ValidationError({'staff': 'Please select a staff member.'})
 
-        if appointment_datetime:
-            existing = Appointment.objects.filter(
-                staff=staff,
-                appointment_datetime=appointment_datetime,
-                status='BOOKED',
+        service = get_service(attrs['service'])
+        if not service.allows(staff.pk):
+            raise serializers.ValidationError({'staff': 'Selected staff does not perform this service.'})
+        if appointment_datetime and not slot_is_open(staff.pk, appointment_datetime, service.duration_minutes):
+            raise serializers.ValidationError(
+                {'appointment_datetime': 'Selected staff is not available in this slot.'}
             )
-            if instance:
-                existing = existing.exclude(pk=instance.pk)
-            if existing.exists():
-                raise serializers.ValidationError(
-                    {'appointment_datetime': 'This staff member is already booked for this slot.'}
-                )
         return attrs
 
     def create(self, validated_data):
-        staff = validated_data['staff']
-        validated_data['stylist_name'] = staff.get_full_name() or staff.username
-        validated_data['duration_minutes'] = 30
-        return super().create(validated_data)
+        return book_appointment(
+            customer=validated_data['customer'],
+            staff=validated_data['staff'],
+            service=validated_data['service'],
+            appointment_datetime=validated_data['appointment_datetime'],
+            notes=validated_data.get('notes', ''),
+        )
+
+
+class AppointmentRowSerializer(ValuesSerializer):
+    """Fast read-only twin of ``AppointmentSerializer`` for listings."""
+
+    fields = (
+        ('id', 'id'),
+        ('customer', 'customer_id'),
+        ('customer_username', 'customer__username'),
+        ('staff', 'staff_id'),
+        ('staff_username', 'staff__username'),
+        ('service', 'service'),
+        ('service_display', 'service'),
+        ('stylist_name', 'stylist_name'),
+        ('appointment_datetime', 'appointment_datetime'),
+        ('duration_minutes', 'duration_minutes'),
+        ('notes', 'notes'),
+        ('status', 'status'),
+        ('status_display', 'status'),
+        ('created_at', 'created_at'),
+    )
+    converters = {
+        'service_display': service_name,
+        'status_display': ValuesSerializer.choice_display(Appointment.STATUS_CHOICES),
+        'appointment_datetime': serializers.DateTimeField().to_representation,
+        'created_at': serializers.DateTimeField().to_representation,
+    }
+    skip_when_null = {'staff_username': 'staff_id'}
 
 
 class StaffSerializer(serializers.ModelSerializer):
@@ -77,6 +142,8 @@ class StaffSerializer(serializers.ModelSerializer):
 
 class StaffScheduleSerializer(serializers.ModelSerializer):
     staff_username = serializers.CharField(source='staff.username', read_only=True)
+    # Set only on blocks expanded from a recurring template; those have no id.
+    template = serializers.IntegerField(source='template_id', read_only=True, allow_null=True)
 
     class Meta:
         model = StaffSchedule
@@ -88,6 +155,7 @@ class StaffScheduleSerializer(serializers.ModelSerializer):
             'start_time',
             'end_time',
             'is_available',
+            'template',
             'created_at',
         ]
         read_only_fields = ['created_at']
@@ -98,9 +166,261 @@ class StaffScheduleSerializer(serializers.ModelSerializer):
         return value
 
 
-class AvailableSlotQuerySerializer(serializers.Serializer):
+class WeekdaysField(serializers.ListField):
+    child = serializers.IntegerField(min_value=0, max_value=6)
+
+    def to_internal_value(self, data):
+        weekdays = super().to_internal_value(data)
+        if not weekdays:
+            raise serializers.ValidationError('Select at least one weekday.')
+        return sum(1 << day for day in set(weekdays))
+
+    def to_representation(self, value):
+        return [day for day in range(7) if value >> day & 1]
+
+
+class StaffScheduleTemplateSerializer(serializers.ModelSerializer):
+    staff_username = serializers.CharField(source='staff.username', read_only=True)
+    weekdays = WeekdaysField(help_text='0 = Monday ... 6 = Sunday')
+
+    class Meta:
+        model = StaffScheduleTemplate
+        fields = [
+            'id',
+            'staff',
+            'staff_username',
+            'weekdays',
+            'start_time',
+            'end_time',
+            'valid_from',
+            'valid_until',
+            'created_at',
+        ]
+        read_only_fields = ['created_at']
+
+    def validate_staff(self, value):
+        if value.role != 'STAFF':
+            raise serializers.ValidationError('Selected user is not a staff member.')
+        return value
+
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError({'end_time': 'Schedule end time must be after start time.'})
+        valid_from = attrs.get('valid_from', getattr(self.instance, 'valid_from', None))
+        valid_until = attrs.get('valid_until', getattr(self.instance, 'valid_until', None))
+        if valid_from and valid_until and valid_until < valid_from:
+            raise serializers.ValidationError({'valid_until': 'Template end date must be on or after its start date.'})
+        return attrs
+
+
+class StaffScheduleExceptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StaffScheduleException
+        fields = ['id', 'template', 'exception_date', 'reason', 'created_at']
+        read_only_fields = ['template', 'created_at']
+        validators = []
+
+    def validate(self, attrs):
+        template = self.context['template']
+        exception_date = attrs['exception_date']
+        if not template.weekdays >> exception_date.weekday() & 1:
+            raise serializers.ValidationError({'exception_date': 'The template does not repeat on this weekday.'})
+        if template.exceptions.filter(exception_date=exception_date).exists():
+            raise serializers.ValidationError({'exception_date': 'This date is already an exception.'})
+        return attrs
+
+
+class StaffScheduleBlockSerializer(serializers.Serializer):
+    staff = serializers.IntegerField()
+    schedule_date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    is_available = serializers.BooleanField(default=True)
+
+
+class StaffSchedulePatternSerializer(serializers.Serializer):
+    staff = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text='0 = Monday ... 6 = Sunday',
+    )
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    is_available = serializers.BooleanField(default=True)
+
+    def validate(self, attrs):
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError({'end_date': 'End date must be on or after start date.'})
+        return attrs
+
+    def expand(self, attrs):
+        weekdays = set(attrs['weekdays'])
+        # Offsets rather than ``day += 1`` so a range ending on date.max cannot overflow.
+        for offset in range((attrs['end_date'] - attrs['start_date']).days + 1):
+            day = attrs['start_date'] + timedelta(days=offset)
+            if day.weekday() in weekdays:
+                for staff_id in attrs['staff']:
+                    yield {
+                        'staff': staff_id,
+                        'schedule_date': day,
+                        'start_time': attrs['start_time'],
+                        'end_time': attrs['end_time'],
+                        'is_available': attrs['is_available'],
+                    }
+
+
+class BulkStaffScheduleSerializer(serializers.Serializer):
+    MAX_ROWS = 2000
+
+    blocks = StaffScheduleBlockSerializer(many=True, required=False)
+    pattern = StaffSchedulePatternSerializer(required=False)
+
+    def validate(self, attrs):
+        rows = list(attrs.get('blocks', []))
+        if attrs.get('pattern'):
+            # Expand one row past the limit at most, however long the date range.
+            rows.extend(islice(StaffSchedulePatternSerializer().expand(attrs['pattern']), self.MAX_ROWS + 1))
+        if not rows:
+            raise serializers.ValidationError('Provide schedule blocks or a weekly pattern.')
+        if len(rows) > self.MAX_ROWS:
+            raise serializers.ValidationError(f'A bulk request can create at most {self.MAX_ROWS} blocks.')
+
+        staff_by_id = User.objects.filter(
+            pk__in={row['staff'] for row in rows},
+            role='STAFF',
+        ).in_bulk()
+        dates = [row['schedule_date'] for row in rows]
+        existing = dict(
+            (row[:4], row[4])
+            for row in StaffSchedule.objects.filter(
+                staff_id__in=list(staff_by_id),
+                schedule_date__gte=min(dates),
+                schedule_date__lte=max(dates),
+            ).values_list('staff_id', 'schedule_date', 'start_time', 'end_time', 'is_available')
+        )
+
+        # Available blocks are merged with overlapping ones on insert, so only
+        # unavailable blocks can collide with the unique constraint.
+        errors = {}
+        seen = set()
+        for index, row in enumerate(rows):
+            key = (row['staff'], row['schedule_date'], row['start_time'], row['end_time'])
+            row_errors = []
+            if row['staff'] not in staff_by_id:
+                row_errors.append('Selected user is not a staff member.')
+            if row['start_time'] >= row['end_time']:
+                row_errors.append('Schedule end time must be after start time.')
+            if key in existing and not (row['is_available'] and existing[key]):
+                row_errors.append('This schedule block already exists.')
+            elif key in seen and not row['is_available']:
+                row_errors.append('This schedule block is repeated in the request.')
+            seen.add(key)
+            if row_errors:
+                errors[index] = row_errors
+        for index, message in self.merge_conflicts(rows, existing, skip=errors):
+            errors.setdefault(index, []).append(message)
+        if errors:
+            raise serializers.ValidationError({'rows': errors})
+
+        attrs['schedules'] = [
+            StaffSchedule(
+                staff=staff_by_id[row['staff']],
+                schedule_date=row['schedule_date'],
+                start_time=row['start_time'],
+                end_time=row['end_time'],
+                is_available=row['is_available'],
+            )
+            for row in rows
+        ]
+        return attrs
+
+    @staticmethod
+    def merge_conflicts(rows, existing, skip=()):
+        """``(index, message)`` for available rows whose merged block would duplicate an unavailable one.
+
+        ``bulk_create_schedules`` merges available rows with each other and
+        with the stored available blocks, so a merged block can land exactly on
+        an unavailable block that no single row matches. Retrying cannot fix
+        that, so it is reported here rather than as a conflict on insert.
+        """
+        unavailable = {key for key, is_available in existing.items() if not is_available}
+        stored = {}
+        for (staff_id, schedule_date, start_time, end_time), is_available in existing.items():
+            if is_available:
+                stored.setdefault((staff_id, schedule_date), []).append((start_time, end_time))
+        requested = {}
+        for index, row in enumerate(rows):
+            key = (row['staff'], row['schedule_date'], row['start_time'], row['end_time'])
+            if not row['is_available']:
+                unavailable.add(key)
+            elif index not in skip:
+                requested.setdefault(key[:2], []).append(index)
+
+        for (staff_id, schedule_date), indexes in requested.items():
+            blocks = [(rows[index]['start_time'], rows[index]['end_time']) for index in indexes]
+            for start_time, end_time in merge_intervals(blocks + stored.get((staff_id, schedule_date), [])):
+                if (staff_id, schedule_date, start_time, end_time) not in unavailable:
+                    continue
+                message = (
+                    f'Merged with overlapping blocks this becomes {start_time:%H:%M}-{end_time:%H:%M}, '
+                    'which is already an unavailable block.'
+                )
+                for index in indexes:
+                    if start_time <= rows[index]['start_time'] and rows[index]['end_time'] <= end_time:
+                        yield index, message
+
+    def create(self, validated_data):
+        return bulk_create_schedules(validated_data['schedules'])
+
+
+class ScheduleListQuerySerializer(serializers.Serializer):
+    MAX_WINDOW_DAYS = 92
+
+    staff_id = serializers.IntegerField(required=False)
+    date = serializers.DateField(required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start_date = attrs.get('date') or attrs.get('start_date')
+        end_date = attrs.get('date') or attrs.get('end_date')
+        if not start_date or not end_date:
+            attrs['window'] = None
+            return attrs
+        if end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'End date must be on or after start date.'})
+        if (end_date - start_date).days >= self.MAX_WINDOW_DAYS:
+            raise serializers.ValidationError(
+                {'end_date': f'Date range cannot exceed {self.MAX_WINDOW_DAYS} days.'}
+            )
+        attrs['window'] = (start_date, end_date + timedelta(days=1))
+        return attrs
+
+
+class ServiceQueryMixin:
+    """Optional ``service`` query parameter resolved to its catalogue entry."""
+
+    def validate_service(self, value):
+        return active_service(value)
+
+    def service_duration(self, attrs, staff=None):
+        service = attrs.get('service')
+        if service is None:
+            return SLOT_MINUTES
+        if staff is not None and not service.allows(staff.pk):
+            raise serializers.ValidationError({'service': 'Selected staff does not perform this service.'})
+        return service.duration_minutes
+
+
+class AvailableSlotQuerySerializer(ServiceQueryMixin, serializers.Serializer):
     staff_id = serializers.IntegerField()
     date = serializers.DateField()
+    service = serializers.CharField(required=False)
 
     def validate(self, attrs):
         staff_id = attrs['staff_id']
@@ -112,37 +432,61 @@ class AvailableSlotQuerySerializer(serializers.Serializer):
         attrs['staff'] = staff
         if slot_date < timezone.localdate():
             raise serializers.ValidationError({'date': 'Date cannot be in the past.'})
+        attrs['duration_minutes'] = self.service_duration(attrs, staff)
         return attrs
 
 
-def generate_available_slots(staff, slot_date):
-    schedules = StaffSchedule.objects.filter(
-        staff=staff,
-        schedule_date=slot_date,
-        is_available=True,
-    ).order_by('start_time')
-    booked_times = set(
-        Appointment.objects.filter(
-            staff=staff,
-            appointment_datetime__date=slot_date,
-            status='BOOKED',
-        ).values_list('appointment_datetime', flat=True)
-    )
+class MonthAvailabilityQuerySerializer(ServiceQueryMixin, serializers.Serializer):
+    staff_id = serializers.IntegerField()
+    month = serializers.CharField()
+    service = serializers.CharField(required=False)
 
-    available = []
-    tz = timezone.get_current_timezone()
-    for schedule in schedules:
-        start_dt = timezone.make_aware(
-            datetime.combine(slot_date, schedule.start_time),
-            timezone=tz,
-        )
-        end_dt = timezone.make_aware(
-            datetime.combine(slot_date, schedule.end_time),
-            timezone=tz,
-        )
-        cursor = start_dt
-        while cursor + timedelta(minutes=30) <= end_dt:
-            if cursor not in booked_times and cursor > timezone.now():
-                available.append(cursor)
-            cursor += timedelta(minutes=30)
-    return available
+    def validate_month(self, value):
+        try:
+            month_start = datetime.strptime(value, '%Y-%m').date()
+        except ValueError as exc:
+            raise serializers.ValidationError('Month must use YYYY-MM format.') from exc
+        today = timezone.localdate()
+        if month_start < today.replace(day=1):
+            raise serializers.ValidationError('Month cannot be in the past.')
+        if month_start.year >= date.max.year:
+            # The month's end would fall past the last representable date.
+            raise serializers.ValidationError(f'Month must be before {date.max.year}.')
+        return month_start
+
+    def validate(self, attrs):
+        try:
+            attrs['staff'] = User.objects.get(pk=attrs['staff_id'], role='STAFF')
+        except User.DoesNotExist as exc:
+            raise serializers.ValidationError({'staff_id': 'Invalid staff id.'}) from exc
+        month_start = attrs['month']
+        if month_start.month == 12:
+            attrs['month_end'] = date(month_start.year + 1, 1, 1)
+        else:
+            attrs['month_end'] = date(month_start.year, month_start.month + 1, 1)
+        attrs['duration_minutes'] = self.service_duration(attrs, attrs['staff'])
+        return attrs
+
+
+class EarliestSlotQuerySerializer(ServiceQueryMixin, serializers.Serializer):
+    MAX_RANGE_DAYS = 31
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    service = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, default=5, min_value=1, max_value=50)
+
+    def validate(self, attrs):
+        today = timezone.localdate()
+        start_date = max(attrs.get('start_date') or today, today)
+        end_date = attrs.get('end_date') or start_date + timedelta(days=13)
+        if end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'End date must be on or after start date.'})
+        if (end_date - start_date).days >= self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError(
+                {'end_date': f'Date range cannot exceed {self.MAX_RANGE_DAYS} days.'}
+            )
+        attrs['start_date'] = start_date
+        attrs['end_date'] = end_date
+        attrs['duration_minutes'] = self.service_duration(attrs)
+        return attrs
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from payments.models import Payment
+from smartsalon_backend import caching
+
+from .availability import SLOT_MINUTES, fit_mask, free_masks, invalidate_staff
+from .catalogue import get_service
+from .intervals import merge_intervals
+from .locks import staff_transaction
+from .models import Appointment, StaffSchedule
+
+
+class SlotUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This staff member is already booked for this slot.'
+    default_code = 'slot_unavailable'
+
+
+class ScheduleConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Some schedule blocks were created concurrently. Please retry.'
+    default_code = 'schedule_conflict'
+
+
+def slot_is_open(staff_id, appointment_datetime, duration_minutes=SLOT_MINUTES):
+    """Check a booking against the (usually cached) free-slot mask of its day."""
+    local_start = timezone.localtime(appointment_datetime)
+    slot_date = local_start.date()
+    mask = free_masks([staff_id], slot_date, slot_date + timedelta(days=1))[(staff_id, slot_date)]
+    index = (local_start.hour * 60 + local_start.minute) // SLOT_MINUTES
+    return bool(fit_mask(mask, duration_minutes) >> index & 1)
+
+
+def book_appointment(customer, staff, service, appointment_datetime, notes=''):
+    """Insert an appointment and its pending payment in one transaction.
+
+    Duration and price come from the service catalogue. The staff member's
+    row is locked while the day's bookings are checked for overlap, and the
+    ``unique_staff_appointment_slot_when_booked`` constraint still backs up
+    identical start times; either conflict surfaces as ``SlotUnavailable``.
+    """
+    service_info = get_service(service)
+    if service_info is None:
+        raise ValueError(f'Unknown service {service!r}.')
+    appointment = Appointment(
+        customer=customer,
+        staff=staff,
+        service=service,
+        stylist_name=staff.get_full_name() or staff.username,
+        appointment_datetime=appointment_datetime,
+        duration_minutes=service_info.duration_minutes,
+        notes=notes,
+    )
+    try:
+        with staff_transaction([staff.pk]):
+            if appointment.overlaps_booking():
+                raise SlotUnavailable()
+            appointment.save(validate=False)
+            Payment.objects.create(
+                appointment=appointment,
+                amount=service_info.price,
+                status='PENDING',
+            )
+    except IntegrityError as exc:
+        raise SlotUnavailable() from exc
+    return appointment
+
+
+def bulk_create_schedules(schedules):
+    """Insert pre-validated schedule blocks with a single ``bulk_create``.
+
+    Available blocks are merged with each other and with the existing
+    available blocks they overlap or touch, so a staff member's day is always
+    stored as disjoint intervals. ``bulk_create`` skips ``save()`` and its
+    signals, so availability caches are invalidated here. Collisions with
+    stored blocks are rejected during validation, so a unique violation here
+    means another request inserted blocks in between (``ScheduleConflict``).
+    """
+    staff_ids = {schedule.staff_id for schedule in schedules}
+    available = [schedule for schedule in schedules if schedule.is_available]
+    rows = [schedule for schedule in schedules if not schedule.is_available]
+    try:
+        with staff_transaction(staff_ids):
+            absorbed = []
+            if available:
+                dates = [schedule.schedule_date for schedule in available]
+                existing = {}
+                for pk, staff_id, schedule_date, start_time, end_time in StaffSchedule.objects.filter(
+                    staff_id__in={schedule.staff_id for schedule in available},
+                    schedule_date__gte=min(dates),
+                    schedule_date__lte=max(dates),
+                    is_available=True,
+                ).values_list('pk', 'staff_id', 'schedule_date', 'start_time', 'end_time'):
+                    existing.setdefault((staff_id, schedule_date), []).append((start_time, end_time, pk))
+
+                requested = {}
+                for schedule in available:
+                    requested.setdefault((schedule.staff_id, schedule.schedule_date), []).append(schedule)
+                for (staff_id, schedule_date), blocks in requested.items():
+                    current = existing.get((staff_id, schedule_date), [])
+                    for start_time, end_time in merge_intervals(
+                        [(block.start_time, block.end_time) for block in blocks]
+                        + [(start, end) for start, end, _ in current]
+                    ):
+                        covered = [
+                            (start, end, pk) for start, end, pk in current if start_time <= start and end <= end_time
+                        ]
+                        if [(start, end) for start, end, _ in covered] == [(start_time, end_time)]:
+                            # The requested blocks already sit inside one stored block.
+                            continue
+                        absorbed.extend(pk for _, _, pk in covered)
+                        rows.append(
+                            StaffSchedule(
+                                staff=blocks[0].staff,
+                                schedule_date=schedule_date,
+                                start_time=start_time,
+                                end_time=end_time,
+                                is_available=True,
+                            )
+                        )
+            if absorbed:
+                StaffSchedule.objects.filter(pk__in=absorbed).delete()
+            created = StaffSchedule.objects.bulk_create(rows)
+            caching.invalidate(caching.SCHEDULES)
+            for staff_id in staff_ids:
+                invalidate_staff(staff_id)
+    except IntegrityError as exc:
+        raise ScheduleConflict() from exc
+    return created
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from payments.models import Payment
+from payments.reports import invalidate_revenue
+from smartsalon_backend import caching
+
+from . import rollups
+from .availability import invalidate_staff
+from .catalogue import invalidate_catalogue
+from .models import Appointment, Service, StaffSchedule, StaffScheduleException, StaffScheduleTemplate
+from .search import install_search_index, refresh_search_text
+
+
+@receiver([post_save, post_delete], sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    caching.invalidate(caching.APPOINTMENTS)
+    # Moving an appointment to another staff member frees the previous one's slot.
+    previous = getattr(instance, '_previous_staff_id', None)
+    if previous is not None and previous != instance.staff_id:
+        invalidate_staff(previous)
+    if instance.staff_id:
+        invalidate_staff(instance.staff_id)
+    instance._previous_staff_id = instance.staff_id
+
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver(m2m_changed, sender=Service.staff.through)
+def service_changed(sender, **kwargs):
+    invalidate_catalogue()
+    caching.invalidate(caching.SERVICES)
+
+
+@receiver(pre_save, sender=Appointment)
+def appointment_rollup_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding and not hasattr(instance, '_rollup_key'):
+        instance._rollup_key = rollups._appointment_key(instance.pk)
+        # The rollup key already carries the stored staff id, so the slot cache needs no query of its own.
+        instance._previous_staff_id = instance._rollup_key[1] if instance._rollup_key else None
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_rollup_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_key = None if created else getattr(instance, '_rollup_key', None)
+    rollups.appointment_saved(instance, previous_key)
+    # Cached revenue periods are grouped by the appointment's staff and service.
+    if previous_key is not None and previous_key[1:3] != instance.rollup_key()[1:3]:
+        invalidate_revenue()
+    instance._rollup_key = instance.rollup_key()
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_rollup_deleted(sender, instance, **kwargs):
+    rollups.appointment_deleted(instance, getattr(instance, '_rollup_key', None) or instance.rollup_key())
+
+
+@receiver(pre_save, sender=Payment)
+def payment_rollup_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding and not hasattr(instance, '_rollup_state'):
+        instance._rollup_state = (
+            Payment.objects.filter(pk=instance.pk).values_list('appointment_id', 'status', 'amount').first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def payment_rollup_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.payment_saved(instance, None if created else getattr(instance, '_rollup_state', None))
+    instance._rollup_state = instance.rollup_state()
+
+
+@receiver(post_delete, sender=Payment)
+def payment_rollup_deleted(sender, instance, **kwargs):
+    rollups.payment_deleted(getattr(instance, '_rollup_state', None) or instance.rollup_state())
+
+
+@receiver(pre_save, sender=StaffSchedule)
+@receiver(pre_save, sender=StaffScheduleTemplate)
+def staff_schedule_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding and not hasattr(instance, '_previous_staff_id'):
+        instance._previous_staff_id = sender.objects.filter(pk=instance.pk).values_list('staff_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=StaffSchedule)
+@receiver([post_save, post_delete], sender=StaffScheduleTemplate)
+def staff_schedule_changed(sender, instance, **kwargs):
+    caching.invalidate(caching.SCHEDULES)
+    # Moving a schedule to another staff member changes the slots of both.
+    previous = getattr(instance, '_previous_staff_id', None)
+    if previous is not None and previous != instance.staff_id:
+        invalidate_staff(previous)
+    invalidate_staff(instance.staff_id)
+    instance._previous_staff_id = instance.staff_id
+
+
+@receiver([post_save, post_delete], sender=StaffScheduleException)
+def staff_schedule_exception_changed(sender, instance, **kwargs):
+    caching.invalidate(caching.SCHEDULES)
+    invalidate_staff(instance.template.staff_id)
+
+
+@receiver(pre_save, sender=get_user_model())
+def user_search_snapshot(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or hasattr(instance, '_search_username'):
+        return
+    if update_fields is None or 'username' in update_fields:
+        instance._search_username = sender.objects.filter(pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    previous = getattr(instance, '_search_username', instance.username)
+    # Only the username is part of the search document, and most saves (logins, profile edits) leave it alone.
+    if previous != instance.username:
+        refresh_search_text(Appointment.objects.filter(Q(customer=instance) | Q(staff=instance)))
+        if Appointment.objects.filter(staff=instance).exists():
+            # Revenue grouped by staff carries the username.
+            invalidate_revenue()
+    instance._search_username = instance.username
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    connection = connections[using]
+    table = Appointment._meta.db_table
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, table)}
+    if 'search_text' in columns:
+        install_search_index(connection)
@@ -1,13 +1,31 @@
-from datetime import timedelta
+import csv
+import gzip
+import json
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from accounts.models import User
+from accounts.tokens import ClaimsRefreshToken
+from payments.models import Payment
+from smartsalon_backend.pagination import KeysetPagination
 
-from .models import Appointment, StaffSchedule
+from .availability import generate_available_slots
+from .catalogue import invalidate_catalogue
+from .management.commands.stress_booking import run_booking_stress
+from .models import Appointment, DailyAppointmentRollup, Service, StaffSchedule, StaffScheduleTemplate
+from .serializers import AppointmentRowSerializer, AppointmentSerializer
 
 
 def next_half_hour(days=1):
@@ -23,6 +41,7 @@ def next_half_hour(days=1):
 
 class AppointmentAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='api_customer',
@@ -58,6 +77,241 @@ class AppointmentAPITests(TestCase):
         )
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Appointment.objects.count(), 1)
+        self.assertEqual(Payment.objects.get().amount, 20)
+
+    def test_api_double_booking_conflict_returns_409(self):
+        payload = {
+            'service': 'HAIRCUT',
+            'staff': self.staff.id,
+            'appointment_datetime': self.slot_dt.isoformat(),
+        }
+        self.assertEqual(self.client.post('/api/appointments/', data=payload, format='json').status_code, 201)
+        # Simulate a racing request that passed validation against a stale availability cache.
+        with mock.patch('appointments.serializers.slot_is_open', return_value=True):
+            response = self.client.post('/api/appointments/', data=payload, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_long_service_books_several_slots(self):
+        self.addCleanup(invalidate_catalogue)
+        Service.objects.create(code='FACIAL90', name='Deluxe facial', price=50, duration_minutes=90)
+        response = self.client.post(
+            '/api/appointments/',
+            data={'service': 'FACIAL90', 'staff': self.staff.id, 'appointment_datetime': self.slot_dt.isoformat()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['duration_minutes'], 90)
+        self.assertEqual(Payment.objects.get().amount, 50)
+
+        response = self.client.get(f'/api/available-slots/?staff_id={self.staff.id}&date={self.slot_dt.date()}')
+        slots = set(response.data['available_slots'])
+        for offset in (0, 30, 60):
+            self.assertNotIn((self.slot_dt + timedelta(minutes=offset)).isoformat(), slots)
+        self.assertIn((self.slot_dt + timedelta(minutes=90)).isoformat(), slots)
+
+        # The 90 minutes left before the schedule ends are too short for a second one.
+        response = self.client.get(
+            f'/api/available-slots/?staff_id={self.staff.id}&date={self.slot_dt.date()}&service=FACIAL90'
+        )
+        self.assertEqual(response.data['available_slots'], [])
+        self.assertEqual(response.data['duration_minutes'], 90)
+
+        overlapping = Appointment(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt + timedelta(minutes=60),
+        )
+        with self.assertRaisesMessage(ValidationError, 'Selected slot is already booked.'):
+            overlapping.full_clean()
+
+    def test_service_staff_restriction_is_enforced(self):
+        self.addCleanup(invalidate_catalogue)
+        other_staff = User.objects.create_user(username='api_other_staff', role='STAFF')
+        service = Service.objects.create(code='COLOUR', name='Colour', price=60, duration_minutes=60)
+        service.staff.add(other_staff)
+        response = self.client.post(
+            '/api/appointments/',
+            data={'service': 'COLOUR', 'staff': self.staff.id, 'appointment_datetime': self.slot_dt.isoformat()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('staff', response.data)
+
+        response = self.client.get('/api/available-slots/earliest/?service=COLOUR')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_service_duration_rule_is_shared_by_model_and_api(self):
+        message = 'Duration must be a multiple of 30 minutes within one day.'
+        with self.assertRaisesMessage(ValidationError, message):
+            Service(code='ODD', name='Odd', price=10, duration_minutes=45).full_clean()
+
+        admin = User.objects.create_user(username='admin_services', password='SmartSalon@123', role='ADMIN')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        response = self.client.post(
+            '/api/services/',
+            data={'code': 'ODD', 'name': 'Odd', 'price': '10.00', 'duration_minutes': 45},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['duration_minutes'], [message])
+
+    def test_api_appointment_list_uses_keyset_pages(self):
+        for offset in range(5):
+            Appointment.objects.create(
+                customer=self.user,
+                staff=self.staff,
+                service='HAIRCUT',
+                appointment_datetime=self.slot_dt + timedelta(minutes=30 * max(offset - 1, 0)),
+                stylist_name=self.staff.username,
+                status='CANCELLED' if offset == 0 else 'BOOKED',
+            )
+
+        first = self.client.get('/api/appointments/?page_size=2')
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertIsNone(third.data['next'])
+        ids = [item['id'] for page in (first, second, third) for item in page.data['results']]
+        self.assertEqual(ids, list(Appointment.objects.order_by('appointment_datetime', 'id').values_list('id', flat=True)))
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(back.data['results'], second.data['results'])
+
+        booked = self.client.get('/api/appointments/?status=BOOKED&page_size=3')
+        self.assertEqual(len(booked.data['results']), 3)
+        self.assertEqual(len(self.client.get(booked.data['next']).data['results']), 1)
+
+        for position in (['notadate', 1], [self.slot_dt.isoformat(), 'x']):
+            cursor = KeysetPagination().encode_cursor(position, False)
+            self.assertEqual(self.client.get(f'/api/appointments/?cursor={cursor}').status_code, 404)
+
+    def test_fast_list_serialization_is_byte_identical(self):
+        Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='FACIAL',
+            appointment_datetime=self.slot_dt,
+            notes='Pr\u00e9f\u00e8re le th\u00e9 \U0001f375',
+        )
+        Appointment.objects.create(
+            customer=self.user,
+            service='PEDICURE',
+            stylist_name='Walk-in',
+            appointment_datetime=self.slot_dt + timedelta(minutes=30),
+            status='CANCELLED',
+        )
+        queryset = Appointment.objects.select_related('customer', 'staff').order_by('id')
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(AppointmentRowSerializer(AppointmentRowSerializer.values(queryset)).data),
+            renderer.render(AppointmentSerializer(queryset, many=True).data),
+        )
+        response = self.client.get('/api/appointments/')
+        self.assertEqual(
+            renderer.render(response.data['results']),
+            renderer.render(AppointmentSerializer(queryset.order_by('appointment_datetime', 'id'), many=True).data),
+        )
+
+    def test_filtered_listing_revalidates_when_a_row_leaves_the_filter(self):
+        appointments = [
+            Appointment.objects.create(
+                customer=self.user,
+                staff=self.staff,
+                service='HAIRCUT',
+                appointment_datetime=self.slot_dt + timedelta(minutes=30 * offset),
+            )
+            for offset in range(2)
+        ]
+        url = '/api/appointments/?status=BOOKED'
+        listing = self.client.get(url)
+        self.assertNotIn('Last-Modified', listing)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=listing['ETag']).status_code, 304)
+        # The validator reads only the requested page, not the whole filtered table.
+        reads = [query['sql'] for query in context.captured_queries if '"appointments_appointment"' in query['sql']]
+        self.assertEqual(len(reads), 1)
+        self.assertIn('LIMIT', reads[0])
+        self.assertNotIn('COUNT(', reads[0])
+
+        appointments[1].status = 'CANCELLED'
+        appointments[1].save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=listing['ETag']).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT').status_code, 200)
+
+    def test_export_streams_scoped_csv_and_gzipped_ndjson(self):
+        other = User.objects.create_user(username='export_other', password='SmartSalon@123', role='CUSTOMER')
+        for offset, customer in enumerate([self.user, self.user, other]):
+            Appointment.objects.create(
+                customer=customer,
+                staff=self.staff,
+                service='HAIRCUT',
+                appointment_datetime=self.slot_dt + timedelta(minutes=30 * offset),
+                notes='=HYPERLINK("http://example.com")' if offset else 'Line one, "quoted"\nline two',
+            )
+
+        response = self.client.get('/api/appointments/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['notes'], 'Line one, "quoted"\nline two')
+        self.assertEqual(rows[1]['notes'], '\'=HYPERLINK("http://example.com")')
+
+        response = self.client.get('/api/appointments/export/?output=ndjson&compress=gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="appointments.ndjson.gz"')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        listed = self.client.get('/api/appointments/').data['results']
+        self.assertEqual([json.loads(line) for line in lines], json.loads(JSONRenderer().render(listed)))
+
+    def test_api_search_is_ranked_and_scoped_to_customer(self):
+        other = User.objects.create_user(username='other_customer', password='SmartSalon@123', role='CUSTOMER')
+        colour = Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt,
+            notes='Colour refresh, colour gloss',
+        )
+        Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='FACIAL',
+            appointment_datetime=self.slot_dt + timedelta(minutes=30),
+            notes='Quick colour check before facial treatment',
+        )
+        Appointment.objects.create(
+            customer=other,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt + timedelta(minutes=60),
+            notes='Colour',
+        )
+
+        response = self.client.get('/api/appointments/?search=colour')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['id'], colour.id)
+
+        combined = self.client.get('/api/appointments/?search=colour%20facial')
+        self.assertEqual([item['service'] for item in combined.data['results']], ['FACIAL'])
+
+        self.staff.username = 'renamed_stylist'
+        self.staff.save()
+        renamed = self.client.get('/api/appointments/?search=renamed&page_size=1')
+        self.assertEqual(len(renamed.data['results']), 1)
+        self.assertEqual(len(self.client.get(renamed.data['next']).data['results']), 1)
+        self.assertFalse(self.client.get('/api/appointments/?search=api_staff').data['results'])
+
+        with mock.patch('appointments.signals.refresh_search_text') as refresh:
+            self.staff.first_name = 'Renamed'
+            self.staff.save()
+        refresh.assert_not_called()
 
     def test_api_available_slots_excludes_booked_slot(self):
         Appointment.objects.create(
@@ -75,6 +329,107 @@ class AppointmentAPITests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertNotIn(self.slot_dt.isoformat(), response.data['available_slots'])
 
+    def test_available_slots_cache_is_invalidated_by_booking(self):
+        url = f'/api/available-slots/?staff_id={self.staff.id}&date={self.slot_dt.date()}'
+        padded_url = f'/api/available-slots/?staff_id=0{self.staff.id}&date={self.slot_dt.date()}'
+        self.assertIn(self.slot_dt.isoformat(), self.client.get(url).data['available_slots'])
+        self.assertIn(self.slot_dt.isoformat(), self.client.get(padded_url).data['available_slots'])
+
+        Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt,
+            stylist_name=self.staff.username,
+        )
+        self.assertNotIn(self.slot_dt.isoformat(), self.client.get(url).data['available_slots'])
+        self.assertNotIn(self.slot_dt.isoformat(), self.client.get(padded_url).data['available_slots'])
+
+    def test_moving_a_schedule_invalidates_both_staff_members(self):
+        other_staff = User.objects.create_user(username='api_staff_moved', password='SmartSalon@123', role='STAFF')
+        url = '/api/available-slots/?staff_id={}&date=' + str(self.slot_dt.date())
+        self.assertIn(self.slot_dt.isoformat(), self.client.get(url.format(self.staff.id)).data['available_slots'])
+        self.assertEqual(self.client.get(url.format(other_staff.id)).data['available_slots'], [])
+
+        schedule = StaffSchedule.objects.get(staff=self.staff)
+        schedule.staff = other_staff
+        schedule.save()
+        self.assertEqual(self.client.get(url.format(self.staff.id)).data['available_slots'], [])
+        self.assertIn(self.slot_dt.isoformat(), self.client.get(url.format(other_staff.id)).data['available_slots'])
+
+    def test_moving_an_appointment_frees_the_previous_staff_members_slot(self):
+        other_staff = User.objects.create_user(username='api_staff_takeover', password='SmartSalon@123', role='STAFF')
+        schedule = StaffSchedule.objects.get(staff=self.staff)
+        StaffSchedule.objects.create(
+            staff=other_staff,
+            schedule_date=schedule.schedule_date,
+            start_time=schedule.start_time,
+            end_time=schedule.end_time,
+        )
+        appointment = Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt,
+            stylist_name=self.staff.username,
+        )
+        url = '/api/available-slots/?staff_id={}&date=' + str(self.slot_dt.date())
+        self.assertNotIn(self.slot_dt.isoformat(), self.client.get(url.format(self.staff.id)).data['available_slots'])
+
+        appointment.staff = other_staff
+        appointment.save()
+        self.assertIn(self.slot_dt.isoformat(), self.client.get(url.format(self.staff.id)).data['available_slots'])
+        self.assertNotIn(self.slot_dt.isoformat(), self.client.get(url.format(other_staff.id)).data['available_slots'])
+
+    def test_overlapping_schedule_blocks_yield_unique_slots(self):
+        StaffSchedule.objects.create(
+            staff=self.staff,
+            schedule_date=self.slot_dt.date(),
+            start_time=self.slot_dt.time(),
+            end_time=(self.slot_dt + timedelta(hours=1)).time(),
+        )
+        slots = generate_available_slots(self.staff, self.slot_dt.date())
+        self.assertEqual(len(slots), len(set(slots)))
+        self.assertEqual(slots, sorted(slots))
+
+    def test_earliest_slots_merges_staff_in_time_order(self):
+        other_staff = User.objects.create_user(username='api_staff_2', password='SmartSalon@123', role='STAFF')
+        StaffSchedule.objects.create(
+            staff=other_staff,
+            schedule_date=self.slot_dt.date(),
+            start_time=(self.slot_dt - timedelta(minutes=30)).time(),
+            end_time=(self.slot_dt + timedelta(hours=1)).time(),
+        )
+        response = self.client.get(
+            f'/api/available-slots/earliest/?limit=4&start_date={self.slot_dt.date()}&end_date={self.slot_dt.date()}'
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(len(results), 4)
+        self.assertEqual([item['slot'] for item in results], sorted(item['slot'] for item in results))
+        self.assertEqual({item['staff_id'] for item in results[:2]}, {self.staff.id, other_staff.id})
+
+    def test_month_availability_counts_free_slots_per_day(self):
+        Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt,
+            stylist_name=self.staff.username,
+        )
+        slot_date = self.slot_dt.date()
+        response = self.client.get(
+            f'/api/available-slots/month/?staff_id={self.staff.id}&month={slot_date:%Y-%m}'
+        )
+        self.assertEqual(response.status_code, 200)
+        counts = {day['date']: day['available_slots'] for day in response.data['days']}
+        self.assertEqual(counts[str(slot_date)], len(generate_available_slots(self.staff, slot_date)))
+        self.assertEqual(sum(counts.values()), counts[str(slot_date)])
+
+        last_month = self.client.get(f'/api/available-slots/month/?staff_id={self.staff.id}&month=9999-12')
+        self.assertEqual(last_month.status_code, 400)
+        self.assertIn('month', last_month.data)
+
     def test_admin_can_create_staff_schedule(self):
         admin = User.objects.create_user(
             username='admin1',
@@ -97,6 +452,164 @@ class AppointmentAPITests(TestCase):
         )
         self.assertEqual(response.status_code, 201)
 
+    def test_admin_bulk_creates_weekly_pattern(self):
+        admin = User.objects.create_user(username='admin_bulk', password='SmartSalon@123', role='ADMIN')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        start = timezone.localdate() + timedelta(days=7)
+        response = self.client.post(
+            '/api/staff-schedules/bulk/',
+            data={
+                'pattern': {
+                    'staff': [self.staff.id],
+                    'start_date': str(start),
+                    'end_date': str(start + timedelta(days=13)),
+                    'weekdays': [0, 1, 2, 3, 4],
+                    'start_time': '09:00:00',
+                    'end_time': '17:00:00',
+                },
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 10)
+        self.assertEqual(StaffSchedule.objects.filter(schedule_date__gte=start).count(), 10)
+
+        # Ranges running up to the last representable date are refused or expanded without overflowing.
+        for start_date, status_code in ((start, 400), (date.max - timedelta(days=6), 201)):
+            pattern = {
+                'staff': [self.staff.id],
+                'start_date': str(start_date),
+                'end_date': str(date.max),
+                'weekdays': [0, 1, 2, 3, 4],
+                'start_time': '09:00:00',
+                'end_time': '17:00:00',
+            }
+            response = self.client.post('/api/staff-schedules/bulk/', data={'pattern': pattern}, format='json')
+            self.assertEqual(response.status_code, status_code)
+
+    def test_bulk_schedule_reports_row_errors_and_creates_nothing(self):
+        admin = User.objects.create_user(username='admin_bulk_2', password='SmartSalon@123', role='ADMIN')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        existing = StaffSchedule.objects.get()
+        day = str(timezone.localdate() + timedelta(days=9))
+        response = self.client.post(
+            '/api/staff-schedules/bulk/',
+            data={
+                'blocks': [
+                    {'staff': self.staff.id, 'schedule_date': day, 'start_time': '09:00', 'end_time': '12:00'},
+                    {
+                        'staff': self.staff.id,
+                        'schedule_date': str(existing.schedule_date),
+                        'start_time': str(existing.start_time),
+                        'end_time': str(existing.end_time),
+                        'is_available': False,
+                    },
+                    {'staff': self.user.id, 'schedule_date': day, 'start_time': '12:00', 'end_time': '11:00'},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json()['rows']), ['1', '2'])
+        self.assertEqual(len(response.data['rows'][2]), 2)
+        self.assertEqual(StaffSchedule.objects.count(), 1)
+
+    def test_overlapping_schedule_blocks_are_merged_on_write(self):
+        day = timezone.localdate() + timedelta(days=6)
+        StaffSchedule.objects.create(staff=self.staff, schedule_date=day, start_time='09:00', end_time='13:00')
+        StaffSchedule.objects.create(staff=self.staff, schedule_date=day, start_time='12:00', end_time='17:00')
+        StaffSchedule.objects.create(staff=self.staff, schedule_date=day, start_time='17:00', end_time='18:00')
+        self.assertEqual(
+            list(StaffSchedule.objects.filter(schedule_date=day).values_list('start_time', 'end_time')),
+            [(time(9), time(18))],
+        )
+
+    def test_bulk_schedule_merges_with_existing_blocks(self):
+        admin = User.objects.create_user(username='admin_bulk_3', password='SmartSalon@123', role='ADMIN')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        day = timezone.localdate() + timedelta(days=8)
+        StaffSchedule.objects.create(staff=self.staff, schedule_date=day, start_time='10:00', end_time='12:00')
+        response = self.client.post(
+            '/api/staff-schedules/bulk/',
+            data={
+                'blocks': [
+                    {'staff': self.staff.id, 'schedule_date': str(day), 'start_time': '08:00', 'end_time': '10:30'},
+                    {'staff': self.staff.id, 'schedule_date': str(day), 'start_time': '11:00', 'end_time': '14:00'},
+                    {'staff': self.staff.id, 'schedule_date': str(day), 'start_time': '15:00', 'end_time': '16:00'},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(StaffSchedule.objects.filter(schedule_date=day).values_list('start_time', 'end_time')),
+            [(time(8), time(14)), (time(15), time(16))],
+        )
+
+    def test_bulk_schedule_refuses_a_merge_onto_an_unavailable_block(self):
+        admin = User.objects.create_user(username='admin_bulk_4', password='SmartSalon@123', role='ADMIN')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        day = timezone.localdate() + timedelta(days=8)
+        StaffSchedule.objects.create(
+            staff=self.staff, schedule_date=day, start_time='08:00', end_time='14:00', is_available=False
+        )
+        response = self.client.post(
+            '/api/staff-schedules/bulk/',
+            data={
+                'blocks': [
+                    {'staff': self.staff.id, 'schedule_date': str(day), 'start_time': '08:00', 'end_time': '10:30'},
+                    {'staff': self.staff.id, 'schedule_date': str(day), 'start_time': '10:00', 'end_time': '14:00'},
+                    {'staff': self.staff.id, 'schedule_date': str(day), 'start_time': '15:00', 'end_time': '16:00'},
+                ],
+            },
+            format='json',
+        )
+        # A permanent conflict: reported per row with 400, not as a 409 that invites a retry.
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['rows']), [0, 1])
+        self.assertIn('08:00-14:00', str(response.data['rows'][0][0]))
+        self.assertEqual(StaffSchedule.objects.filter(schedule_date=day).count(), 1)
+
+    def test_recurring_template_is_expanded_for_slots_and_listing(self):
+        admin = User.objects.create_user(username='admin_template', password='SmartSalon@123', role='ADMIN')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        day = timezone.localdate() + timedelta(days=10)
+        response = self.client.post(
+            '/api/staff-schedule-templates/',
+            data={
+                'staff': self.staff.id,
+                'weekdays': [day.weekday()],
+                'start_time': '09:00',
+                'end_time': '11:00',
+                'valid_from': str(timezone.localdate()),
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['weekdays'], [day.weekday()])
+        self.assertEqual(len(generate_available_slots(self.staff, day)), 4)
+        Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=generate_available_slots(self.staff, day)[0],
+            stylist_name=self.staff.username,
+        )
+        self.assertEqual(len(generate_available_slots(self.staff, day)), 3)
+
+        listing = self.client.get(f'/api/staff-schedules/?staff_id={self.staff.id}&date={day}')
+        self.assertEqual(listing.status_code, 200)
+        self.assertEqual([(block['id'], block['template']) for block in listing.data], [(None, response.data['id'])])
+
+        exception = self.client.post(
+            f"/api/staff-schedule-templates/{response.data['id']}/exceptions/",
+            data={'exception_date': str(day), 'reason': 'Holiday'},
+            format='json',
+        )
+        self.assertEqual(exception.status_code, 201)
+        self.assertEqual(generate_available_slots(self.staff, day), [])
+        self.assertEqual(StaffScheduleTemplate.objects.count(), 1)
+
     def test_customer_cannot_create_staff_schedule(self):
         date = timezone.localdate() + timedelta(days=5)
         response = self.client.post(
@@ -111,3 +624,81 @@ class AppointmentAPITests(TestCase):
             format='json',
         )
         self.assertEqual(response.status_code, 403)
+
+    def test_daily_rollups_track_bookings_payments_and_cancellations(self):
+        def snapshot():
+            fields = ['date', 'staff_id', 'service', 'status', 'appointment_count', 'requested_payments', 'paid_amount']
+            return sorted(
+                tuple(row[field] for field in fields)
+                for row in DailyAppointmentRollup.objects.filter(appointment_count__gt=0).values(*fields)
+            )
+
+        response = self.client.post(
+            '/api/appointments/',
+            data={'service': 'FACIAL', 'staff': self.staff.id, 'appointment_datetime': self.slot_dt.isoformat()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        payment = Payment.objects.get()
+        payment.mark_requested()
+        payment.mark_paid()
+        Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt + timedelta(minutes=30),
+            stylist_name=self.staff.username,
+        )
+        self.client.post(f"/api/appointments/{response.data['id']}/cancel/")
+
+        day = timezone.localtime(self.slot_dt).date()
+        expected = [
+            (day, self.staff.id, 'FACIAL', 'CANCELLED', 1, 0, 35),
+            (day, self.staff.id, 'HAIRCUT', 'BOOKED', 1, 0, 0),
+        ]
+        self.assertEqual(snapshot(), expected)
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(snapshot(), expected)
+
+    def test_dashboard_query_count_is_fixed_per_role(self):
+        appointment = Appointment.objects.create(
+            customer=self.user,
+            staff=self.staff,
+            service='HAIRCUT',
+            appointment_datetime=self.slot_dt,
+            stylist_name=self.staff.username,
+        )
+        Payment.objects.create(appointment=appointment, amount=20, status='REQUESTED')
+        admin = User.objects.create_user(username='api_admin', password='SmartSalon@123', role='ADMIN')
+
+        # Claims-bearing tokens authenticate without loading the user row; the first query is the token
+        # version (only cached with a shared cache), and the ETag comes from cache generations.
+        expected = {self.user: 3, self.staff: 4, admin: 5}
+        for user, queries in expected.items():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+            with self.assertNumQueries(queries):
+                response = client.get('/api/dashboard/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['appointments_count'], 1)
+            self.assertEqual(response.data['upcoming_count'], 1)
+            self.assertEqual(response.data['week_count'], 1)
+            self.assertEqual(response.data['pending_payments'], 1)
+            self.assertEqual(response.data['requested_payments'], 1)
+            with self.assertNumQueries(1):
+                unchanged = client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(unchanged.status_code, 304)
+
+        Payment.objects.filter(appointment=appointment).get().mark_paid()
+        changed = client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data['requested_payments'], 0)
+
+
+class BookingConcurrencyTests(TransactionTestCase):
+    def test_concurrent_bookings_for_one_slot_never_double_book(self):
+        cache.clear()
+        stats = run_booking_stress(threads=4, rounds=3)
+        self.assertEqual(stats['double_booked_rounds'], 0)
+        self.assertEqual(stats['booked'], 3)
+        self.assertEqual(stats['booked'] + stats['conflicts'] + stats['errors'], stats['attempts'])
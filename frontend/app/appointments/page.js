@@ -4,7 +4,7 @@ import { useEffect, useMemo, useState } from "react";
 import { useRouter } from "next/navigation";
 
 import AppHeader from "@/components/AppHeader";
-import { apiRequest, isAbortError, isAuthError } from "@/lib/api";
+import { apiRequest, isAbortError, isAuthError, toApiPath } from "@/lib/api";
 import { clearAuth, getAccessToken, getStoredUser } from "@/lib/auth";
 
 const initialForm = {
@@ -19,7 +19,10 @@ export default function AppointmentsPage() {
   const router = useRouter();
   const currentUser = useMemo(() => getStoredUser(), []);
   const [appointments, setAppointments] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [moreLoading, setMoreLoading] = useState(false);
   const [staffList, setStaffList] = useState([]);
+  const [services, setServices] = useState([]);
   const [availableSlots, setAvailableSlots] = useState([]);
   const [form, setForm] = useState(initialForm);
   const [error, setError] = useState("");
@@ -29,7 +32,29 @@ export default function AppointmentsPage() {
 
   const loadAppointments = async (token, signal) => {
     const data = await apiRequest("/api/appointments/", { token, signal });
-    setAppointments(data);
+    setAppointments(data.results || []);
+    setNextPage(data.next);
+  };
+
+  const loadMoreAppointments = async () => {
+    if (!nextPage) return;
+    setError("");
+    setMoreLoading(true);
+    try {
+      const token = getAccessToken();
+      const data = await apiRequest(toApiPath(nextPage), { token });
+      setAppointments((current) => [...current, ...(data.results || [])]);
+      setNextPage(data.next);
+    } catch (err) {
+      if (isAuthError(err)) {
+        clearAuth();
+        router.replace("/login");
+        return;
+      }
+      setError(err.message);
+    } finally {
+      setMoreLoading(false);
+    }
   };
 
   const loadStaff = async (token, signal) => {
@@ -37,12 +62,18 @@ export default function AppointmentsPage() {
     setStaffList(data);
   };
 
-  const loadAvailableSlots = async (token, staffId, date, signal) => {
+  const loadServices = async (token, signal) => {
+    const data = await apiRequest("/api/services/", { token, signal });
+    setServices(data);
+  };
+
+  const loadAvailableSlots = async (token, staffId, date, service, signal) => {
     if (!staffId || !date) {
       setAvailableSlots([]);
       return;
     }
-    const response = await apiRequest(`/api/available-slots/?staff_id=${staffId}&date=${date}`, {
+    const query = new URLSearchParams({ staff_id: staffId, date, service });
+    const response = await apiRequest(`/api/available-slots/?${query}`, {
       token,
       signal,
     });
@@ -63,7 +94,7 @@ export default function AppointmentsPage() {
       try {
         const requests = [loadAppointments(token, controller.signal)];
         if (canBook) {
-          requests.push(loadStaff(token, controller.signal));
+          requests.push(loadStaff(token, controller.signal), loadServices(token, controller.signal));
         }
         await Promise.all(requests);
       } catch (err) {
@@ -106,7 +137,7 @@ export default function AppointmentsPage() {
     const timeoutId = window.setTimeout(async () => {
       setSlotsLoading(true);
       try {
-        await loadAvailableSlots(token, form.staff, form.date, controller.signal);
+        await loadAvailableSlots(token, form.staff, form.date, form.service, controller.signal);
       } catch (err) {
         if (isAbortError(err)) {
           return;
@@ -131,12 +162,12 @@ export default function AppointmentsPage() {
       window.clearTimeout(timeoutId);
       controller.abort();
     };
-  }, [canBook, form.date, form.staff, router]);
+  }, [canBook, form.date, form.service, form.staff, router]);
 
   const handleFormChange = (field, value) => {
     setError("");
     const next = { ...form, [field]: value };
-    if (field === "staff" || field === "date") {
+    if (field === "staff" || field === "date" || field === "service") {
       next.appointment_datetime = "";
       setAvailableSlots([]);
       setForm(next);
@@ -215,7 +246,7 @@ export default function AppointmentsPage() {
           <section className="rounded-2xl border border-amber-100 bg-white p-6 shadow-sm">
             <h1 className="text-2xl font-semibold text-stone-900">Book Appointment</h1>
             <p className="mt-1 text-sm text-stone-600">
-              Choose staff and date to see free 30-minute slots. Book only from available slots.
+              Choose a service, staff and date to see free start times. Book only from available slots.
             </p>
             <form className="mt-5 grid gap-3 sm:grid-cols-2" onSubmit={handleBook}>
               <select
@@ -223,10 +254,11 @@ export default function AppointmentsPage() {
                 value={form.service}
                 onChange={(event) => handleFormChange("service", event.target.value)}
               >
-                <option value="HAIRCUT">Haircut</option>
-                <option value="FACIAL">Facial</option>
-                <option value="MANICURE">Manicure</option>
-                <option value="PEDICURE">Pedicure</option>
+                {services.map((service) => (
+                  <option key={service.code} value={service.code}>
+                    {service.name} ({service.duration_minutes} min, {service.price})
+                  </option>
+                ))}
               </select>
               <input
                 type="date"
@@ -258,7 +290,7 @@ export default function AppointmentsPage() {
                 </div>
               </div>
               <div className="sm:col-span-2">
-                <p className="mb-2 text-sm font-medium text-stone-700">Choose Available 30-Min Slot</p>
+                <p className="mb-2 text-sm font-medium text-stone-700">Choose Available Start Time</p>
                 <div className="grid grid-cols-3 gap-2 sm:grid-cols-5">
                   {availableSlots.map((slot) => {
                     const isSelected = slot === form.appointment_datetime;
@@ -353,6 +385,16 @@ export default function AppointmentsPage() {
               ) : null}
             </tbody>
           </table>
+          {nextPage ? (
+            <button
+              type="button"
+              className="mt-3 rounded-md border border-stone-300 px-4 py-2 text-sm text-stone-700 hover:border-emerald-400 disabled:opacity-60"
+              onClick={loadMoreAppointments}
+              disabled={moreLoading}
+            >
+              {moreLoading ? "Loading..." : "Load more"}
+            </button>
+          ) : null}
         </section>
       </main>
     </>
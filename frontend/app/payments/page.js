@@ -4,15 +4,44 @@ import { useEffect, useMemo, useState } from "react";
 import { useRouter } from "next/navigation";
 
 import AppHeader from "@/components/AppHeader";
-import { apiRequest, isAbortError, isAuthError } from "@/lib/api";
+import { apiRequest, isAbortError, isAuthError, toApiPath } from "@/lib/api";
 import { clearAuth, getAccessToken, getStoredUser } from "@/lib/auth";
 
 export default function PaymentsPage() {
   const router = useRouter();
   const currentUser = useMemo(() => getStoredUser(), []);
   const [payments, setPayments] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [moreLoading, setMoreLoading] = useState(false);
   const [error, setError] = useState("");
 
+  const loadPayments = async (token, signal) => {
+    const data = await apiRequest("/api/payments/", { token, signal });
+    setPayments(data.results || []);
+    setNextPage(data.next);
+  };
+
+  const loadMorePayments = async () => {
+    if (!nextPage) return;
+    setError("");
+    setMoreLoading(true);
+    try {
+      const token = getAccessToken();
+      const data = await apiRequest(toApiPath(nextPage), { token });
+      setPayments((current) => [...current, ...(data.results || [])]);
+      setNextPage(data.next);
+    } catch (err) {
+      if (isAuthError(err)) {
+        clearAuth();
+        router.replace("/login");
+        return;
+      }
+      setError(err.message);
+    } finally {
+      setMoreLoading(false);
+    }
+  };
+
   useEffect(() => {
     const token = getAccessToken();
     if (!token) {
@@ -25,11 +54,7 @@ export default function PaymentsPage() {
 
     const fetchPayments = async () => {
       try {
-        const data = await apiRequest("/api/payments/", {
-          token,
-          signal: controller.signal,
-        });
-        setPayments(data);
+        await loadPayments(token, controller.signal);
       } catch (err) {
         if (isAbortError(err)) {
           return;
@@ -61,8 +86,31 @@ export default function PaymentsPage() {
         token,
         data: { method, transaction_reference: "" },
       });
-      const data = await apiRequest("/api/payments/", { token });
-      setPayments(data);
+      await loadPayments(token);
+    } catch (err) {
+      if (isAuthError(err)) {
+        clearAuth();
+        router.replace("/login");
+        return;
+      }
+      setError(err.message);
+    }
+  };
+
+  const canApprove = currentUser?.role === "ADMIN" || currentUser?.role === "STAFF";
+  const requestedIds = payments.filter((payment) => payment.status === "REQUESTED").map((payment) => payment.id);
+
+  const approveAllRequested = async () => {
+    if (!requestedIds.length) return;
+    setError("");
+    try {
+      const token = getAccessToken();
+      await apiRequest("/api/payments/bulk-approve/", {
+        method: "POST",
+        token,
+        data: { ids: requestedIds },
+      });
+      await loadPayments(token);
     } catch (err) {
       if (isAuthError(err)) {
         clearAuth();
@@ -122,6 +170,15 @@ export default function PaymentsPage() {
         <section className="rounded-2xl border border-amber-100 bg-white p-6 shadow-sm">
           <h1 className="text-2xl font-semibold text-stone-900">Payments</h1>
           <p className="mt-1 text-sm text-stone-600">Track pending and completed payments.</p>
+          {canApprove && requestedIds.length ? (
+            <button
+              type="button"
+              className="mt-3 rounded-md bg-emerald-700 px-4 py-2 text-sm text-white hover:bg-emerald-800"
+              onClick={approveAllRequested}
+            >
+              Approve {requestedIds.length} Requested
+            </button>
+          ) : null}
           {error ? <p className="mt-3 text-sm text-rose-700">{error}</p> : null}
         </section>
 
@@ -157,6 +214,16 @@ export default function PaymentsPage() {
               ) : null}
             </tbody>
           </table>
+          {nextPage ? (
+            <button
+              type="button"
+              className="mt-3 rounded-md border border-stone-300 px-4 py-2 text-sm text-stone-700 hover:border-emerald-400 disabled:opacity-60"
+              onClick={loadMorePayments}
+              disabled={moreLoading}
+            >
+              {moreLoading ? "Loading..." : "Load more"}
+            </button>
+          ) : null}
         </section>
       </main>
     </>
@@ -114,7 +114,8 @@ async function requestJson(
         headers,
         body: data !== undefined ? JSON.stringify(data) : undefined,
         signal: controller.signal,
-        cache: "no-store",
+        // Revalidate with the stored ETag every time; unchanged lists come back as 304.
+        cache: "no-cache",
       });
     } catch (error) {
       if (timedOut) {
@@ -193,4 +194,9 @@ export async function apiRequest(
   }
 }
 
+export function toApiPath(url) {
+  const parsed = new URL(url, API_BASE_URL);
+  return `${parsed.pathname}${parsed.search}`;
+}
+
 export { API_BASE_URL };
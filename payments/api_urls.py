@@ -1,8 +1,19 @@
 from django.urls import path
 
-from .api_views import PaymentListAPIView, PaymentMarkPaidAPIView
+from .api_views import (
+    PaymentApprovalQueueAPIView,
+    PaymentBulkApproveAPIView,
+    PaymentExportAPIView,
+    PaymentListAPIView,
+    PaymentMarkPaidAPIView,
+    RevenueReportAPIView,
+)
 
 urlpatterns = [
     path('payments/', PaymentListAPIView.as_view(), name='api-payments'),
+    path('payments/export/', PaymentExportAPIView.as_view(), name='api-payments-export'),
+    path('payments/approval-queue/', PaymentApprovalQueueAPIView.as_view(), name='api-payment-approval-queue'),
+    path('payments/revenue/', RevenueReportAPIView.as_view(), name='api-payment-revenue'),
+    path('payments/bulk-approve/', PaymentBulkApproveAPIView.as_view(), name='api-payment-bulk-approve'),
     path('payments/<int:payment_id>/mark-paid/', PaymentMarkPaidAPIView.as_view(), name='api-payment-mark-paid'),
 ]
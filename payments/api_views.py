@@ -1,21 +1,161 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from smartsalon_backend import caching
+from smartsalon_backend.conditional import conditional_response, page_validator
+from smartsalon_backend.exports import ExportQuerySerializer, streaming_export
+from smartsalon_backend.pagination import KeysetPagination
+
 from .models import Payment
-from .serializers import MarkPaymentPaidSerializer, PaymentSerializer
+from .serializers import (
+    BulkApproveSerializer,
+    MarkPaymentPaidSerializer,
+    PaymentListQuerySerializer,
+    PaymentRowSerializer,
+    PaymentSerializer,
+    RevenueReportQuerySerializer,
+)
+from .reports import revenue_report
+from .services import bulk_approve_payments
+
+
+def payment_list_validator(view, request):
+    # Rows also carry appointment fields, customer usernames and service names, which the generations cover.
+    # No Last-Modified, for the same reason as the appointment listing.
+    return (
+        None,
+        page_validator(view, view.filter_queryset(view.get_queryset())),
+        *caching.generations([caching.APPOINTMENTS, caching.STAFF, caching.SERVICES]),
+    )
+
+
+class IsApproverRole(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role in ['ADMIN', 'STAFF'])
+
+
+class IsAdminRole(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role == 'ADMIN')
 
 
 class PaymentListAPIView(generics.ListAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    @conditional_response(payment_list_validator)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
         queryset = Payment.objects.select_related('appointment', 'appointment__customer')
         if self.request.user.role == 'CUSTOMER':
             queryset = queryset.filter(appointment__customer=self.request.user)
+
+        query = PaymentListQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = query.validated_data
+        if 'status' in filters:
+            queryset = queryset.filter(status=filters['status'])
+        if 'method' in filters:
+            queryset = queryset.filter(method=filters['method'])
+        if 'created_from' in filters:
+            queryset = queryset.filter(created_at__gte=filters['created_from'])
+        if 'created_before' in filters:
+            queryset = queryset.filter(created_at__lt=filters['created_before'])
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        keyset_fields = [field.lstrip('-') for field in self.keyset_ordering]
+        queryset = PaymentRowSerializer.values(self.filter_queryset(self.get_queryset()), *keyset_fields)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(PaymentRowSerializer(page).data)
+
+
+class PaymentExportAPIView(PaymentListAPIView):
+    """Stream the payment list (same scoping and filters) as CSV or NDJSON."""
+
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        queryset = PaymentRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        return streaming_export(
+            PaymentRowSerializer,
+            queryset.order_by(*self.keyset_ordering),
+            'payments',
+            **query.validated_data,
+        )
+
+
+class PaymentApprovalQueueAPIView(PaymentListAPIView):
+    """REQUESTED payments, oldest first, for staff and admins to approve."""
+
+    permission_classes = [IsApproverRole]
+    keyset_ordering = ('created_at', 'id')
+
+    def get_queryset(self):
+        return Payment.objects.filter(status='REQUESTED')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # Served from the (status, created_at, id) index; the queue stays small even when history grows.
+        response.data = {'count': self.get_queryset().count(), **response.data}
+        return response
+
+
+class RevenueReportAPIView(APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        query = RevenueReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        rows = revenue_report(
+            params['start_date'],
+            params['end_date'] + timedelta(days=1),
+            granularity=params['granularity'],
+            group_by=params['group_by'],
+        )
+        return Response(
+            {
+                'start_date': params['start_date'],
+                'end_date': params['end_date'],
+                'granularity': params['granularity'],
+                'group_by': params['group_by'],
+                'total_revenue': f"{sum(Decimal(row['revenue']) for row in rows):.2f}",
+                'total_payments': sum(row['payments'] for row in rows),
+                'results': rows,
+            }
+        )
+
+
+class PaymentBulkApproveAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkApproveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcomes = bulk_approve_payments(
+            request.user,
+            serializer.validated_data['ids'],
+            method=serializer.validated_data.get('method'),
+            transaction_reference=serializer.validated_data.get('transaction_reference'),
+        )
+        return Response(
+            {
+                'approved': sum(outcome == 'approved' for outcome in outcomes.values()),
+                'results': [{'id': payment_id, 'outcome': outcome} for payment_id, outcome in outcomes.items()],
+            }
+        )
+
 
 class PaymentMarkPaidAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
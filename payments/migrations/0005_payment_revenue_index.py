@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_dailyappointmentrollup'),
+        ('payments', '0004_payment_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'paid_at'], name='payment_status_paid_idx'),
+        ),
+    ]
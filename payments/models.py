@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from smartsalon_backend.conditional import with_updated_at
+
 
 class Payment(models.Model):
     METHOD_CHOICES = (
@@ -26,9 +28,33 @@ class Payment(models.Model):
     transaction_reference = models.CharField(max_length=120, blank=True)
     paid_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'id'], name='payment_status_created_idx'),
+            models.Index(fields=['method', 'created_at', 'id'], name='payment_method_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='payment_created_id_idx'),
+            models.Index(fields=['status', 'paid_at'], name='payment_status_paid_idx'),
+            models.Index(fields=['updated_at'], name='payment_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & {'appointment_id', 'status', 'amount'}:
+            instance._rollup_state = instance.rollup_state()
+        return instance
+
+    def rollup_state(self):
+        return (self.appointment_id, self.status, self.amount)
+
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = with_updated_at(kwargs.get('update_fields'))
+        # Appointment rollups are updated by post_save handlers inside this transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def mark_paid(self):
         self.status = 'PAID'
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from appointments.availability import day_bounds
+from smartsalon_backend import caching
+
+from .models import Payment
+
+CACHE_PREFIX = 'revenue'
+GRANULARITIES = ('day', 'week', 'month')
+GROUP_LOOKUPS = {
+    'service': ('appointment__service',),
+    'method': ('method',),
+    'staff': ('appointment__staff_id', 'appointment__staff__username'),
+}
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def buckets(start_date, end_date, granularity):
+    """``(period, start, end)`` buckets covering [start_date, end_date), clipped to the range."""
+    period = bucket_start(start_date, granularity)
+    while period < end_date:
+        following = next_bucket(period, granularity)
+        yield period, max(period, start_date), min(following, end_date)
+        period = following
+
+
+def invalidate_revenue():
+    """Drop cached closed periods, e.g. after a paid payment is deleted or reverted, or its
+    appointment's staff, service or staff username changes."""
+    caching.invalidate(CACHE_PREFIX)
+
+
+def query_revenue(start_date, end_date, granularity, group_by):
+    """One GROUP BY over PAID payments with ``paid_at`` in local days [start_date, end_date)."""
+    range_start, range_end = day_bounds(start_date, end_date)
+    group_lookups = [lookup for name in group_by for lookup in GROUP_LOOKUPS[name]]
+    return (
+        Payment.objects.filter(status='PAID', paid_at__gte=range_start, paid_at__lt=range_end)
+        .annotate(
+            period=Trunc('paid_at', granularity, output_field=DateField(), tzinfo=timezone.get_current_timezone())
+        )
+        .values('period', *group_lookups)
+        .annotate(revenue=Sum('amount'), payments=Count('id'))
+        .order_by('period', *group_lookups)
+    )
+
+
+def _row(row, group_by):
+    item = {'period': row['period'].isoformat()}
+    for name in group_by:
+        lookups = GROUP_LOOKUPS[name]
+        item[name] = row[lookups[0]]
+        if name == 'staff':
+            item['staff_username'] = row[lookups[1]]
+    item['revenue'] = f"{row['revenue']:.2f}"
+    item['payments'] = row['payments']
+    return item
+
+
+def revenue_report(start_date, end_date, granularity='day', group_by=()):
+    """Revenue rows for local dates [start_date, end_date).
+
+    Periods that ended before today can no longer gain payments (``paid_at``
+    is always set to the approval time), so when
+    ``REVENUE_CACHE_CLOSED_PERIODS`` is on they are cached without expiry and
+    only open periods hit the database. Edits to the grouped fields of past
+    payments invalidate them (see ``invalidate_revenue``).
+    """
+    group_by = sorted(group_by)
+    today = timezone.localdate()
+    generation = caching.generation(CACHE_PREFIX)
+    periods = list(buckets(start_date, end_date, granularity))
+    keys = {
+        period: f'{CACHE_PREFIX}:{generation}:{granularity}:{",".join(group_by)}:{start}:{end}'
+        for period, start, end in periods
+        if settings.REVENUE_CACHE_CLOSED_PERIODS and end <= today
+    }
+    cached = cache.get_many(list(keys.values())) if keys else {}
+    rows_by_period = {period: cached[key] for period, key in keys.items() if key in cached}
+
+    missing = [(period, start, end) for period, start, end in periods if period not in rows_by_period]
+    if missing:
+        computed = {period: [] for period, _, _ in missing}
+        for row in query_revenue(missing[0][1], missing[-1][2], granularity, group_by):
+            if row['period'] in computed:
+                computed[row['period']].append(_row(row, group_by))
+        cache.set_many({keys[period]: rows for period, rows in computed.items() if period in keys}, timeout=None)
+        rows_by_period.update(computed)
+
+    return [row for period, _, _ in periods for row in rows_by_period[period]]
@@ -1,6 +1,13 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
+from appointments.catalogue import service_name
+from smartsalon_backend.serializers import ValuesSerializer
+
 from .models import Payment
+from .reports import GRANULARITIES, GROUP_LOOKUPS
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -28,7 +35,86 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['appointment', 'amount', 'status', 'paid_at', 'created_at']
 
 
+class PaymentRowSerializer(ValuesSerializer):
+    """Fast read-only twin of ``PaymentSerializer`` for listings."""
+
+    fields = (
+        ('id', 'id'),
+        ('appointment', 'appointment_id'),
+        ('customer_username', 'appointment__customer__username'),
+        ('service_display', 'appointment__service'),
+        ('amount', 'amount'),
+        ('method', 'method'),
+        ('method_display', 'method'),
+        ('status', 'status'),
+        ('status_display', 'status'),
+        ('transaction_reference', 'transaction_reference'),
+        ('paid_at', 'paid_at'),
+        ('created_at', 'created_at'),
+    )
+    converters = {
+        'service_display': service_name,
+        'amount': serializers.DecimalField(max_digits=8, decimal_places=2).to_representation,
+        'method_display': ValuesSerializer.choice_display(Payment.METHOD_CHOICES),
+        'status_display': ValuesSerializer.choice_display(Payment.STATUS_CHOICES),
+        'paid_at': serializers.DateTimeField().to_representation,
+        'created_at': serializers.DateTimeField().to_representation,
+    }
+
+
 class MarkPaymentPaidSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = ['method', 'transaction_reference']
+
+
+class BulkApproveSerializer(serializers.Serializer):
+    MAX_IDS = 500
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=MAX_IDS)
+    method = serializers.ChoiceField(choices=Payment.METHOD_CHOICES, required=False)
+    transaction_reference = serializers.CharField(max_length=120, required=False, allow_blank=True)
+
+
+class PaymentListQuerySerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Payment.STATUS_CHOICES, required=False)
+    method = serializers.ChoiceField(choices=Payment.METHOD_CHOICES, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        date_from = attrs.get('date_from')
+        date_to = attrs.get('date_to')
+        if date_from and date_to and date_to < date_from:
+            raise serializers.ValidationError({'date_to': 'End date must be on or after start date.'})
+        # Half-open local-day bounds so the created_at indexes can be used.
+        if date_from:
+            attrs['created_from'] = timezone.make_aware(datetime.combine(date_from, time.min))
+        if date_to:
+            attrs['created_before'] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        return attrs
+
+
+class RevenueReportQuerySerializer(serializers.Serializer):
+    MAX_RANGE_DAYS = 731
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+    group_by = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_group_by(self, value):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(names) - set(GROUP_LOOKUPS))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown grouping: {', '.join(unknown)}. Use {', '.join(GROUP_LOOKUPS)}."
+            )
+        return list(dict.fromkeys(names))
+
+    def validate(self, attrs):
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError({'end_date': 'End date must be on or after start date.'})
+        if (attrs['end_date'] - attrs['start_date']).days >= self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError({'end_date': f'Date range cannot exceed {self.MAX_RANGE_DAYS} days.'})
+        return attrs
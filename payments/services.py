@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.utils import timezone
+
+from appointments.rollups import move_payments
+from smartsalon_backend import caching
+
+from .models import Payment
+
+APPROVER_ROLES = ('ADMIN', 'STAFF')
+
+
+def bulk_approve_payments(user, payment_ids, method=None, transaction_reference=None):
+    """Move every REQUESTED payment in ``payment_ids`` to PAID with one conditional UPDATE.
+
+    Returns ``{payment_id: outcome}`` where outcome is ``approved``,
+    ``wrong_state``, ``not_found`` or ``forbidden``.
+    """
+    payment_ids = list(dict.fromkeys(payment_ids))
+    if user.role not in APPROVER_ROLES:
+        return dict.fromkeys(payment_ids, 'forbidden')
+
+    with transaction.atomic():
+        rows = {
+            payment_id: (status, appointment_id, amount)
+            for payment_id, status, appointment_id, amount in Payment.objects.select_for_update()
+            .filter(pk__in=payment_ids)
+            .values_list('id', 'status', 'appointment_id', 'amount')
+        }
+        eligible = [payment_id for payment_id, row in rows.items() if row[0] == 'REQUESTED']
+        if eligible:
+            now = timezone.now()
+            changes = {'status': 'PAID', 'paid_at': now, 'updated_at': now}
+            if method:
+                changes['method'] = method
+            if transaction_reference is not None:
+                changes['transaction_reference'] = transaction_reference
+            # update() skips the post_save handlers, so rollups and the cache generation are updated explicitly.
+            Payment.objects.filter(pk__in=eligible, status='REQUESTED').update(**changes)
+            move_payments([rows[payment_id][1:] for payment_id in eligible], 'REQUESTED', 'PAID')
+            caching.invalidate(caching.PAYMENTS)
+
+    outcomes = {}
+    for payment_id in payment_ids:
+        if payment_id not in rows:
+            outcomes[payment_id] = 'not_found'
+        else:
+            outcomes[payment_id] = 'approved' if rows[payment_id][0] == 'REQUESTED' else 'wrong_state'
+    return outcomes
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from smartsalon_backend import caching
+
+from .models import Payment
+from .reports import invalidate_revenue
+
+
+@receiver(pre_save, sender=Payment)
+def payment_revenue_changing(sender, instance, raw=False, **kwargs):
+    # New revenue only ever lands in the open period; closed periods change
+    # only when an already paid payment is edited or removed.
+    loaded = getattr(instance, '_rollup_state', None)
+    if not raw and loaded and loaded[1] == 'PAID':
+        invalidate_revenue()
+
+
+@receiver(post_delete, sender=Payment)
+def payment_revenue_deleted(sender, instance, **kwargs):
+    if instance.status == 'PAID':
+        invalidate_revenue()
+
+
+@receiver([post_save, post_delete], sender=Payment)
+def payment_changed(sender, **kwargs):
+    caching.invalidate(caching.PAYMENTS)
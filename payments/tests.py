@@ -1,14 +1,20 @@
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from accounts.models import User
-from appointments.models import Appointment
+from appointments.models import Appointment, DailyAppointmentRollup, StaffSchedule
 
 from .models import Payment
+from .serializers import PaymentSerializer
 
 
 def next_half_hour(days=1):
@@ -24,6 +30,7 @@ def next_half_hour(days=1):
 
 class PaymentAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='api_payuser',
@@ -90,3 +97,198 @@ class PaymentAPITests(TestCase):
             format='json',
         )
         self.assertEqual(response.status_code, 400)
+
+    def test_fast_list_serialization_is_byte_identical(self):
+        self.payment.mark_requested()
+        self.payment.mark_paid()
+        Payment.objects.create(
+            appointment=Appointment.objects.create(
+                customer=self.user,
+                service='FACIAL',
+                stylist_name='Ana',
+                appointment_datetime=next_half_hour(days=2),
+            ),
+            amount='35.5',
+            method='UPI',
+        )
+        response = self.client.get('/api/payments/')
+        self.assertEqual(response.status_code, 200)
+        queryset = Payment.objects.select_related('appointment', 'appointment__customer').order_by('-created_at', '-id')
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(response.data['results']),
+            renderer.render(PaymentSerializer(queryset, many=True).data),
+        )
+
+    def test_payment_list_filters_and_pages(self):
+        other = Payment.objects.create(
+            appointment=Appointment.objects.create(
+                customer=self.user,
+                service='FACIAL',
+                stylist_name='Ana',
+                appointment_datetime=next_half_hour(days=2),
+            ),
+            amount=35,
+            method='UPI',
+        )
+        first = self.client.get('/api/payments/?page_size=1')
+        self.assertEqual([item['id'] for item in first.data['results']], [other.id])
+        second = self.client.get(first.data['next'])
+        self.assertEqual([item['id'] for item in second.data['results']], [self.payment.id])
+        self.assertIsNone(second.data['next'])
+
+        self.assertEqual([item['id'] for item in self.client.get('/api/payments/?method=UPI').data['results']], [other.id])
+        today = timezone.localdate()
+        in_range = self.client.get(f'/api/payments/?status=PENDING&date_from={today}&date_to={today}')
+        self.assertEqual(len(in_range.data['results']), 2)
+        later = today + timedelta(days=1)
+        self.assertFalse(self.client.get(f'/api/payments/?date_from={later}').data['results'])
+        self.assertEqual(self.client.get('/api/payments/?status=UNKNOWN').status_code, 400)
+
+    def test_approval_queue_lists_requested_oldest_first(self):
+        self.assertEqual(self.client.get('/api/payments/approval-queue/').status_code, 403)
+        later = Payment.objects.create(
+            appointment=Appointment.objects.create(
+                customer=self.user,
+                service='FACIAL',
+                stylist_name='Ana',
+                appointment_datetime=next_half_hour(days=2),
+            ),
+            amount=35,
+        )
+        later.mark_requested()
+        self.payment.mark_requested()
+
+        staff = User.objects.create_user(username='api_approver', password='SmartSalon@123', role='STAFF')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(staff).access_token}')
+        response = self.client.get('/api/payments/approval-queue/?page_size=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([item['id'] for item in response.data['results']], [self.payment.id])
+        self.assertEqual(
+            [item['id'] for item in self.client.get(response.data['next']).data['results']],
+            [later.id],
+        )
+
+    def test_bulk_approve_reports_outcomes_with_one_update(self):
+        requested = []
+        for days in (2, 3):
+            payment = Payment.objects.create(
+                appointment=Appointment.objects.create(
+                    customer=self.user,
+                    service='FACIAL',
+                    stylist_name='Ana',
+                    appointment_datetime=next_half_hour(days=days),
+                ),
+                amount=35,
+            )
+            payment.mark_requested()
+            requested.append(payment.id)
+        ids = [*requested, self.payment.id, 9999]
+
+        customer_response = self.client.post('/api/payments/bulk-approve/', data={'ids': ids}, format='json')
+        self.assertEqual({item['outcome'] for item in customer_response.data['results']}, {'forbidden'})
+
+        staff = User.objects.create_user(username='api_bulk_staff', password='SmartSalon@123', role='STAFF')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(staff).access_token}')
+        listing = self.client.get('/api/payments/')
+        self.assertNotIn('Last-Modified', listing)
+        unchanged = self.client.get('/api/payments/', HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(unchanged.status_code, 304)
+        # Rows show the appointment's service, so editing it changes the listing too.
+        self.appointment.service = 'HAIRCUT'
+        self.appointment.save()
+        listing = self.client.get('/api/payments/', HTTP_IF_NONE_MATCH=listing['ETag'])
+        self.assertEqual(listing.status_code, 200)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/api/payments/bulk-approve/',
+                data={'ids': ids, 'method': 'CARD', 'transaction_reference': 'EOD-1'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['approved'], 2)
+        self.assertEqual(
+            [item['outcome'] for item in response.data['results']],
+            ['approved', 'approved', 'wrong_state', 'not_found'],
+        )
+        payment_updates = [
+            query for query in context.captured_queries if query['sql'].startswith('UPDATE "payments_payment"')
+        ]
+        self.assertEqual(len(payment_updates), 1)
+        self.assertEqual(Payment.objects.filter(status='PAID', method='CARD', transaction_reference='EOD-1').count(), 2)
+        rollup = DailyAppointmentRollup.objects.aggregate(paid=Sum('paid_amount'), requested=Sum('requested_payments'))
+        self.assertEqual(rollup, {'paid': 70, 'requested': 0})
+        # update() bypasses auto_now, so the bulk approval has to move updated_at itself.
+        self.assertEqual(self.client.get('/api/payments/', HTTP_IF_NONE_MATCH=listing['ETag']).status_code, 200)
+
+    def test_revenue_report_groups_in_sql_and_caches_closed_periods(self):
+        cache.clear()
+        today = timezone.localdate()
+        first_of_month = today.replace(day=1)
+        last_month = (first_of_month - timedelta(days=1)).replace(day=1)
+        paid_days = [last_month, last_month + timedelta(days=1), today]
+        for index, paid_day in enumerate(paid_days):
+            payment = Payment.objects.create(
+                appointment=Appointment.objects.create(
+                    customer=self.user,
+                    service='FACIAL' if index else 'HAIRCUT',
+                    stylist_name='Ana',
+                    appointment_datetime=next_half_hour(days=index + 2),
+                ),
+                amount=10 * (index + 1),
+                status='PAID',
+            )
+            paid_at = timezone.make_aware(datetime.combine(paid_day, time(12)))
+            Payment.objects.filter(pk=payment.pk).update(paid_at=paid_at)
+
+        admin = User.objects.create_user(username='api_report_admin', password='SmartSalon@123', role='ADMIN')
+        self.assertEqual(self.client.get('/api/payments/revenue/').status_code, 403)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        url = f'/api/payments/revenue/?start_date={last_month}&end_date={today}&granularity=month&group_by=service'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['period'], row['service'], row['revenue'], row['payments']) for row in response.data['results']],
+            [
+                (str(last_month), 'FACIAL', '20.00', 1),
+                (str(last_month), 'HAIRCUT', '10.00', 1),
+                (str(first_of_month), 'FACIAL', '30.00', 1),
+            ],
+        )
+        self.assertEqual(response.data['total_revenue'], '60.00')
+
+        closed = f'/api/payments/revenue/?start_date={last_month}&end_date={first_of_month - timedelta(days=1)}'
+        self.assertEqual(len(self.client.get(closed).data['results']), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(closed).data['total_revenue'], '30.00')
+
+        grouped = closed + '&group_by=service,staff'
+        self.assertEqual([row['service'] for row in self.client.get(grouped).data['results']], ['HAIRCUT', 'FACIAL'])
+        appointment = Appointment.objects.get(service='HAIRCUT')
+        appointment.service = 'FACIAL'
+        appointment.staff = User.objects.create_user(username='report_staff', role='STAFF')
+        start = timezone.localtime(appointment.appointment_datetime)
+        StaffSchedule.objects.create(
+            staff=appointment.staff,
+            schedule_date=start.date(),
+            start_time=start.time(),
+            end_time=(start + timedelta(hours=1)).time(),
+        )
+        appointment.save()
+        rows = self.client.get(grouped).data['results']
+        self.assertEqual([(row['service'], row['staff_username']) for row in rows], [('FACIAL', 'report_staff'), ('FACIAL', None)])
+        appointment.staff.username = 'report_staff_renamed'
+        appointment.staff.save()
+        self.assertEqual(self.client.get(grouped).data['results'][0]['staff_username'], 'report_staff_renamed')
+
+    def test_export_applies_list_filters(self):
+        self.payment.mark_requested()
+        response = self.client.get('/api/payments/export/?status=REQUESTED')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'appointment', 'customer_username'])
+        self.assertEqual(len(lines), 2)
+        empty = self.client.get('/api/payments/export/?status=PAID')
+        self.assertEqual(b''.join(empty.streaming_content).decode().count('\n'), 1)
+        self.assertEqual(self.client.get('/api/payments/export/?output=xml').status_code, 400)
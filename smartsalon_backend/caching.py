@@ -0,0 +1,117 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+from . import metrics
+
+# Generations shared by the read endpoints; the signal handlers bump them on every write.
+STAFF = 'staff'
+SCHEDULES = 'schedules'
+APPOINTMENTS = 'appointments'
+PAYMENTS = 'payments'
+SERVICES = 'services'
+
+
+def is_shared(alias='default'):
+    """Whether every worker reads and writes the same ``alias`` cache, rather than one per process."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def generation_key(name):
+    return f'gen:{name}'
+
+
+def _seed(key):
+    # A missing counter (evicted, or lost with a restart) starts from the clock rather than 0, so it can never
+    # count back through values that entries cached before the loss are still stored under.
+    seed = time.time_ns()
+    cache.add(key, seed, timeout=None)
+    value = cache.get(key)
+    return seed if value is None else value
+
+
+def generation(name):
+    key = generation_key(name)
+    value = cache.get(key)
+    return _seed(key) if value is None else value
+
+
+def generations(names):
+    keys = [generation_key(name) for name in names]
+    values = cache.get_many(keys)
+    return [values[key] if key in values else _seed(key) for key in keys]
+
+
+def _bump(names):
+    for name in names:
+        key = generation_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            _seed(key)
+
+
+def invalidate(*names):
+    """Bump the generations ``names``, orphaning every cache entry keyed by them in O(1).
+
+    The bump is repeated on commit so a reader that computed a value from
+    pre-commit data cannot publish it under the new generation.
+    """
+    _bump(names)
+    transaction.on_commit(lambda: _bump(names))
+
+
+def cached_response(*names, vary=None):
+    """Cache a view method's ``200`` responses under the current generations of ``names``.
+
+    ``names`` are generation names, or callables that take the request and
+    return one (e.g. a per-staff generation from a query parameter).
+    ``vary(request)`` adds any further key parts; the full path is always
+    part of the key. Apply it to ``get`` only after the response is known to
+    be the same for every caller allowed to see it.
+    """
+
+    def decorator(method):
+        label = method.__qualname__.split('.')[0]
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            parts = generations(name(request) if callable(name) else name for name in names)
+            parts.append(request.get_full_path())
+            if vary is not None:
+                parts.append(vary(request))
+            digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+            key = f'response:{label}:{digest}'
+            data = cache.get(key)
+            if data is not None:
+                metrics.increment(f'cache.{label}.hits')
+                return Response(data)
+            metrics.increment(f'cache.{label}.misses')
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    """Hits, misses and hit ratio per cached view, from this worker's counters."""
+    counters = metrics.snapshot()['counters']
+    stats = {}
+    for name, count in counters.items():
+        prefix, _, outcome = name.rpartition('.')
+        if name.startswith('cache.') and outcome in ('hits', 'misses'):
+            stats.setdefault(prefix[len('cache.'):], {'hits': 0, 'misses': 0})[outcome] = count
+    for entry in stats.values():
+        entry['hit_ratio'] = round(entry['hits'] / (entry['hits'] + entry['misses']), 3)
+    return stats
@@ -0,0 +1,69 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def with_updated_at(update_fields):
+    # auto_now only reaches the database when ``updated_at`` is among the saved fields.
+    return {*update_fields, 'updated_at'} if update_fields else update_fields
+
+
+def queryset_validator(queryset, field='updated_at'):
+    """``(max(field), count)`` of a scoped queryset in one aggregate query.
+
+    Any insert or update moves the maximum and any delete lowers the count,
+    so the pair changes whenever the rows behind a listing do.
+    """
+    values = queryset.order_by().aggregate(last_modified=Max(field), count=Count('pk'))
+    return values['last_modified'], values['count']
+
+
+def page_validator(view, queryset, field='updated_at'):
+    """``(pk, field)`` of the rows on the requested keyset page, and its link positions.
+
+    One page-sized query, so revalidating a page costs the same however large
+    the table grows. Any row entering, leaving or changing on the page changes
+    the result. Unpaginated views (exports) fall back to ``queryset_validator``.
+    """
+    if view.pagination_class is None:
+        return queryset_validator(queryset, field)
+    paginator = view.pagination_class()
+    keyset = [name.lstrip('-') for name in view.keyset_ordering]
+    rows = paginator.paginate_queryset(queryset.values('pk', field, *keyset), view.request, view=view)
+    return [(row['pk'], row[field]) for row in rows], paginator.next_position, paginator.previous_position
+
+
+def conditional_response(validator):
+    """Answer ``If-None-Match``/``If-Modified-Since`` with 304 before the view method runs.
+
+    ``validator(view, request)`` returns ``(last_modified, *parts)``, where
+    ``last_modified`` may be ``None``, and must be for filtered or paginated
+    listings, whose maximum ``updated_at`` stays put when a row leaves them. The ETag also covers the full path and
+    the caller, since the same URL lists different rows for each customer.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            last_modified, *parts = validator(view, request)
+            parts = [request.get_full_path(), request.user.pk, last_modified, *parts]
+            etag = quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+                # Responses depend on the Authorization header: keep them out of shared caches
+                # and have browsers revalidate on every use.
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
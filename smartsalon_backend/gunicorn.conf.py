@@ -13,3 +13,17 @@ max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '50'))
 accesslog = '-'
 errorlog = '-'
 loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    # Run the first readiness check while the worker boots rather than on its first probe.
+    from smartsalon_backend.health import monitor
+
+    monitor.start()
+
+
+def worker_exit(server, worker):
+    # Stop the password hashing processes together with the worker that spawned them.
+    from accounts.hashing import shutdown_pool
+
+    shutdown_pool()
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _request_started(**kwargs):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+
+
+def _request_finished(**kwargs):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight = max(_in_flight - 1, 0)
+
+
+request_started.connect(_request_started, dispatch_uid='health_in_flight_started')
+request_finished.connect(_request_finished, dispatch_uid='health_in_flight_finished')
+
+
+class HealthMonitor:
+    """Readiness checks run by one background thread per worker, at most every ``interval`` seconds.
+
+    Probes only read the last snapshot, so their cost does not depend on how
+    often they arrive, and a hanging database stalls the checker thread
+    instead of request threads. A snapshot older than ``STALE_INTERVALS``
+    intervals is reported as not ready. Until the first check completes,
+    probes wait up to ``STARTUP_WAIT`` seconds for it.
+    """
+
+    STALE_INTERVALS = 3
+    STARTUP_WAIT = 2.0
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self._snapshot = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connected_at = None
+        self._migrations_applied = False
+        self._first_check = threading.Event()
+
+    @property
+    def interval(self):
+        return settings.HEALTH_CHECK_INTERVAL
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # Keep the thread alive; the snapshot goes stale and readiness fails until a check succeeds.
+                logger.exception('Health check failed')
+            time.sleep(self.interval)
+
+    def snapshot(self):
+        self.start()
+        if self._snapshot is None:
+            self._first_check.wait(self.STARTUP_WAIT)
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'status': 'starting'}
+        age = time.monotonic() - snapshot['checked_at']
+        status = snapshot['status']
+        if age > self.interval * self.STALE_INTERVALS:
+            status = 'stale'
+        result = {key: value for key, value in snapshot.items() if key != 'checked_at'}
+        result.update(status=status, age_seconds=round(age, 1), threads=self.threads())
+        return result
+
+    def threads(self):
+        total = settings.WORKER_THREADS
+        return {'busy': _in_flight, 'total': total, 'saturation': round(_in_flight / total, 2)}
+
+    def refresh(self):
+        # The checker thread owns its connection, so CONN_MAX_AGE is enforced here rather than by request signals.
+        close_old_connections()
+        database = self.check_database()
+        migrations = self.check_migrations() if database['status'] == 'ok' else {'status': 'unknown'}
+        ready = database['status'] == 'ok' and migrations['status'] == 'ok'
+        self._snapshot = {
+            'status': 'ok' if ready else 'error',
+            'checked_at': time.monotonic(),
+            'checked': timezone.now().isoformat(),
+            'database': database,
+            'migrations': migrations,
+        }
+        self._first_check.set()
+
+    def check_database(self):
+        connection = connections[self.alias]
+        started = time.perf_counter()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except Exception as exc:
+            connection.close()
+            return {'status': 'error', 'detail': str(exc)}
+        latency = (time.perf_counter() - started) * 1000
+        if connection.connection is not self._connection:
+            self._connection = connection.connection
+            self._connected_at = time.monotonic()
+        return {
+            'status': 'ok',
+            'latency_ms': round(latency, 3),
+            'connection_age_seconds': round(time.monotonic() - self._connected_at, 1),
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        }
+
+    def check_migrations(self):
+        # Migration files cannot change under a running process, so once everything is applied it stays that way.
+        if self._migrations_applied:
+            return {'status': 'ok', 'pending': 0}
+        executor = MigrationExecutor(connections[self.alias])
+        pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        self._migrations_applied = not pending
+        return {'status': 'ok' if not pending else 'pending', 'pending': len(pending)}
+
+
+monitor = HealthMonitor()
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# In-process only: each worker reports its own numbers.
+RESERVOIR_SIZE = 2048
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_latencies = defaultdict(lambda: deque(maxlen=RESERVOIR_SIZE))
+_latency_counts = defaultdict(int)
+
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def observe(name, milliseconds):
+    with _lock:
+        _latencies[name].append(milliseconds)
+        _latency_counts[name] += 1
+
+
+@contextmanager
+def timer(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - started) * 1000)
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(name):
+    """Count plus p50/p95/p99/max in milliseconds over the last ``RESERVOIR_SIZE`` observations."""
+    with _lock:
+        ordered = sorted(_latencies.get(name, ()))
+        count = _latency_counts.get(name, 0)
+    if not ordered:
+        return {'count': count}
+    return {
+        'count': count,
+        'p50_ms': round(_percentile(ordered, 0.50), 3),
+        'p95_ms': round(_percentile(ordered, 0.95), 3),
+        'p99_ms': round(_percentile(ordered, 0.99), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        names = list(_latencies)
+    return {'counters': counters, 'latency': {name: latency_summary(name) for name in names}}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
+        _latency_counts.clear()
@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a composite, unique ordering such as ``(appointment_datetime, id)``.
+
+    Each page is one ``WHERE (a, b) > (:a, :b) ORDER BY a, b LIMIT n`` query, so
+    the cost of a page does not depend on how deep into the table it is. Views
+    choose the ordering with ``keyset_ordering``; fields may be prefixed with
+    ``-`` for descending order and must not be nullable.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', ('id',)))
+        self.size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*(self.flip(field) if reverse else field for field in self.ordering))
+        if position is None:
+            rows = list(queryset[: self.size + 1])
+        else:
+            # Cursor values are client input: one that does not fit its field is an invalid cursor, not a 500.
+            try:
+                rows = list(queryset.filter(self.position_filter(position, reverse))[: self.size + 1])
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        has_more = len(rows) > self.size
+        rows = rows[: self.size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.row_position(rows[-1]) if rows and (has_more or reverse) else None
+        self.previous_position = (
+            self.row_position(rows[0]) if rows and (has_more if reverse else position is not None) else None
+        )
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                'next': self.build_link(self.next_position, reverse=False),
+                'previous': self.build_link(self.previous_position, reverse=True),
+                'results': data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def position_filter(self, position, reverse):
+        # Row-value comparison expanded into OR-ed prefixes: a > x OR (a = x AND b > y) ...
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            prefix = {other.lstrip('-'): position[other_index] for other_index, other in enumerate(self.ordering[:index])}
+            condition |= Q(**prefix, **{f'{name}__{"lt" if descending else "gt"}': position[index]})
+        return condition
+
+    def row_position(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [self.encode_value(value) for value in position], 'r': reverse}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+    @staticmethod
+    def encode_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def build_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,54 @@
+class ValuesSerializer:
+    """Read-only, list-only serializer over ``QuerySet.values()`` rows.
+
+    Subclasses declare ``fields`` as ``(name, lookup)`` pairs in output order.
+    ``converters`` maps a field name to a callable applied to non-null values
+    (typically a DRF field's ``to_representation`` or a choice-display lookup),
+    and ``skip_when_null`` maps a field name to a lookup whose ``NULL`` drops the
+    field, matching how DRF skips dotted sources through a null relation.
+    The output must stay identical to the model serializer it shadows.
+    """
+
+    fields = ()
+    converters = {}
+    skip_when_null = {}
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def lookups(cls, *extra):
+        return list(dict.fromkeys([lookup for _, lookup in cls.fields] + list(extra)))
+
+    @classmethod
+    def values(cls, queryset, *extra):
+        return queryset.values(*cls.lookups(*extra))
+
+    @classmethod
+    def plan(cls):
+        if '_plan' not in cls.__dict__:
+            cls._plan = [
+                (name, lookup, cls.converters.get(name), cls.skip_when_null.get(name)) for name, lookup in cls.fields
+            ]
+        return cls._plan
+
+    @staticmethod
+    def choice_display(choices):
+        labels = dict(choices)
+        return lambda value: labels.get(value, value)
+
+    @property
+    def data(self):
+        plan = self.plan()
+        data = []
+        for row in self.rows:
+            item = {}
+            for name, lookup, converter, skip_lookup in plan:
+                if skip_lookup is not None and row[skip_lookup] is None:
+                    continue
+                value = row[lookup]
+                if converter is not None and value is not None:
+                    value = converter(value)
+                item[name] = value
+            data.append(item)
+        return data
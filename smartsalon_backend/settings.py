@@ -48,6 +48,21 @@ def env_int(name, default=0):
         return default
 
 
+def env_bucket(name, default):
+    """A ``capacity/seconds`` token bucket, checked at startup rather than on the first throttled request."""
+    value = os.getenv(name, default).strip()
+    if not value:
+        return value
+    try:
+        capacity, seconds = value.split('/')
+        capacity, seconds = int(capacity), float(seconds)
+    except ValueError:
+        raise ValueError(f'{name} must look like capacity/seconds, e.g. 60/60.') from None
+    if capacity < 1 or not 0 < seconds < float('inf'):
+        raise ValueError(f'{name} needs a capacity of at least 1 and a positive number of seconds.')
+    return value
+
+
 def database_config():
     database_url = os.getenv('DATABASE_URL')
     if not database_url:
@@ -149,6 +164,9 @@ INSTALLED_APPS = [
 
 AUTH_USER_MODEL = 'accounts.User' #added this so it can ignore the default user module and uses mine.
 
+# ModelBackend with password hashing moved off the request thread (see accounts/hashing.py).
+AUTHENTICATION_BACKENDS = ['accounts.backends.PooledHashingBackend']
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -189,6 +207,10 @@ DATABASES = {
 }
 DATABASES['default']['CONN_MAX_AGE'] = env_int('DB_CONN_MAX_AGE', 60 if not DEBUG else 0)
 DATABASES['default']['CONN_HEALTH_CHECKS'] = env_bool('DB_CONN_HEALTH_CHECKS', default=not DEBUG)
+# /health/ready/ serves a snapshot refreshed in the background at most this often.
+HEALTH_CHECK_INTERVAL = env_int('HEALTH_CHECK_INTERVAL', 10)
+# Request threads per worker (gunicorn gthread), for the readiness saturation figure.
+WORKER_THREADS = env_int('GUNICORN_THREADS', 4)
 if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
     database_options = DATABASES['default'].setdefault('OPTIONS', {})
     default_sslmode = 'require' if not DEBUG else ''
@@ -197,6 +219,30 @@ if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
         database_options['sslmode'] = sslmode
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'smartsalon-default'),
+        # Throttle buckets, cached responses and availability masks share this cache; LocMemCache's default
+        # of 300 entries would keep evicting them.
+        'OPTIONS': {'MAX_ENTRIES': env_int('CACHE_MAX_ENTRIES', 20000)},
+    }
+}
+AVAILABILITY_CACHE_TIMEOUT = env_int('AVAILABILITY_CACHE_TIMEOUT', 300)
+# Cached responses are keyed by generations, so this only bounds how long unused entries linger.
+RESPONSE_CACHE_TIMEOUT = env_int('RESPONSE_CACHE_TIMEOUT', 600)
+REVENUE_CACHE_CLOSED_PERIODS = env_bool('REVENUE_CACHE_CLOSED_PERIODS', default=True)
+SERVICE_CATALOGUE_TTL = env_int('SERVICE_CATALOGUE_TTL', 60)
+TOKEN_REVOCATION_SET_SIZE = env_int('TOKEN_REVOCATION_SET_SIZE', 10000)
+# Password hashing runs in a process pool so logins cannot starve the request threads; 0 hashes inline.
+PASSWORD_HASH_WORKERS = env_int('PASSWORD_HASH_WORKERS', 0 if DEBUG else 2)
+PASSWORD_HASH_MAX_PENDING = env_int('PASSWORD_HASH_MAX_PENDING', 8)
+PASSWORD_HASH_RETRY_AFTER = env_int('PASSWORD_HASH_RETRY_AFTER', 2)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -246,12 +292,27 @@ LOGOUT_REDIRECT_URL = '/admin/login/'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'smartsalon_backend.throttling.TokenBucketThrottle',
+    ],
+    # Trusted reverse proxies in front of the app. 0 keys clients by REMOTE_ADDR; never leave it unset, as
+    # DRF would then key them by the whole client-controlled X-Forwarded-For header.
+    'NUM_PROXIES': env_int('NUM_PROXIES', 0),
+}
+
+# Token buckets as 'capacity/seconds' (burst size / seconds to refill it); empty disables a class.
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'cache')
+THROTTLE_BUCKETS = {
+    'read': env_bucket('THROTTLE_READ', '300/60'),
+    'slots': env_bucket('THROTTLE_SLOTS', '120/60'),
+    'write': env_bucket('THROTTLE_WRITE', '60/60'),
+    'auth': env_bucket('THROTTLE_AUTH', '20/300'),
 }
 
 if not DEBUG:
@@ -268,6 +329,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
 }
 
 DJANGO_LOG_LEVEL = os.getenv('DJANGO_LOG_LEVEL', 'DEBUG' if DEBUG else 'INFO').upper()
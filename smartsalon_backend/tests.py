@@ -0,0 +1,272 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from accounts.tokens import ClaimsRefreshToken
+from appointments.models import Appointment, StaffSchedule
+from payments.models import Payment
+
+from . import metrics
+from . import caching
+from .caching import cache_stats
+from .health import HealthMonitor
+from .settings import env_bucket
+from .throttling import STORES
+
+APP_TABLE_PREFIXES = ('accounts_', 'appointments_', 'payments_')
+
+
+def full_table_scans(sql, params=()):
+    """Application tables that ``sql`` reads in full.
+
+    A walk over a whole index (``SCAN ... USING INDEX``) only counts as bounded
+    when the query has a ``LIMIT``: the paginated list queries rely on it and
+    stop after a page of rows, but an unbounded one still touches every row.
+    Full-text index lookups (``VIRTUAL TABLE INDEX``) are accepted.
+    """
+    bounded = ' LIMIT ' in sql
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = [row[0] for row in cursor.fetchall()]
+            cursor.execute('SET LOCAL enable_seqscan = on')
+            scans = []
+            for index, line in enumerate(plan):
+                if 'Seq Scan on ' in line:
+                    scans.append(line.split('Seq Scan on ', 1)[1].split()[0])
+                elif ' Scan using ' in line and not bounded:
+                    # An index scan without an Index Cond walks the whole index.
+                    details = []
+                    for detail in plan[index + 1:]:
+                        if '->' in detail:
+                            break
+                        details.append(detail)
+                    if not any('Index Cond' in detail for detail in details):
+                        scans.append(line.split(' on ', 1)[1].split()[0])
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = [row[-1] for row in cursor.fetchall()]
+            scans = [
+                detail.split()[1]
+                for detail in details
+                if detail.startswith('SCAN ')
+                and 'VIRTUAL TABLE INDEX' not in detail
+                and ('USING' not in detail or not bounded)
+            ]
+    return [table for table in scans if table.startswith(APP_TABLE_PREFIXES)]
+
+
+class QueryPlanTests(TestCase):
+    """Fail when an endpoint's queries fall back to a full scan of an application table."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = User.objects.create_user(username='plan_customer', password='SmartSalon@123')
+        self.staff = User.objects.create_user(username='plan_staff', password='SmartSalon@123', role='STAFF')
+        self.admin = User.objects.create_user(username='plan_admin', password='SmartSalon@123', role='ADMIN')
+        self.slot_date = timezone.localdate() + timedelta(days=3)
+        StaffSchedule.objects.create(
+            staff=self.staff,
+            schedule_date=self.slot_date,
+            start_time='09:00',
+            end_time='17:00',
+        )
+        appointment = Appointment.objects.create(
+            customer=self.customer,
+            staff=self.staff,
+            service='HAIRCUT',
+            stylist_name=self.staff.username,
+            appointment_datetime=timezone.make_aware(
+                timezone.datetime.combine(self.slot_date, timezone.datetime.min.time().replace(hour=10))
+            ),
+        )
+        Payment.objects.create(appointment=appointment, amount=20)
+
+    def assertNoFullScans(self, user, url):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects, url)
+        for sql in selects:
+            self.assertEqual(full_table_scans(sql), [], f'{url}: {sql}')
+
+    def test_detector_flags_unindexed_filter(self):
+        sql, params = Appointment.objects.filter(notes='x').order_by().query.sql_with_params()
+        self.assertEqual(full_table_scans(sql, params), ['appointments_appointment'])
+
+    def test_detector_flags_unbounded_index_scan(self):
+        # Counting every row walks a whole (covering) index; only a LIMIT makes such a walk acceptable.
+        sql, params = Appointment.objects.order_by('appointment_datetime', 'id').values('id').query.sql_with_params()
+        self.assertEqual(full_table_scans(sql, params), ['appointments_appointment'])
+        self.assertEqual(full_table_scans(f'{sql} LIMIT 10', params), [])
+
+    def test_customer_appointment_list(self):
+        self.assertNoFullScans(self.customer, '/api/appointments/?status=BOOKED')
+
+    def test_admin_appointment_list_page(self):
+        self.assertNoFullScans(self.admin, '/api/appointments/')
+        self.assertNoFullScans(self.admin, '/api/appointments/?status=BOOKED')
+
+    def test_appointment_search(self):
+        self.assertNoFullScans(self.admin, '/api/appointments/?search=plan_customer')
+        self.assertNoFullScans(self.customer, '/api/appointments/?search=haircut')
+
+    def test_available_slots(self):
+        self.assertNoFullScans(
+            self.customer,
+            f'/api/available-slots/?staff_id={self.staff.id}&date={self.slot_date}',
+        )
+
+    def test_month_availability(self):
+        self.assertNoFullScans(
+            self.customer,
+            f'/api/available-slots/month/?staff_id={self.staff.id}&month={self.slot_date:%Y-%m}',
+        )
+
+    def test_staff_list(self):
+        self.assertNoFullScans(self.customer, '/api/staff/')
+
+    def test_staff_schedule_list(self):
+        self.assertNoFullScans(self.admin, f'/api/staff-schedules/?staff_id={self.staff.id}&date={self.slot_date}')
+
+    def test_customer_dashboard(self):
+        self.assertNoFullScans(self.customer, '/api/dashboard/')
+
+    def test_customer_payment_list(self):
+        self.assertNoFullScans(self.customer, '/api/payments/')
+
+    def test_admin_payment_list_filters(self):
+        today = timezone.localdate()
+        self.assertNoFullScans(self.admin, '/api/payments/')
+        self.assertNoFullScans(self.admin, '/api/payments/?status=REQUESTED')
+        self.assertNoFullScans(self.admin, '/api/payments/?method=UPI')
+        self.assertNoFullScans(self.admin, f'/api/payments/?date_from={today}&date_to={today}')
+
+    def test_revenue_report(self):
+        today = timezone.localdate()
+        start = today - timedelta(days=365)
+        self.assertNoFullScans(
+            self.admin,
+            f'/api/payments/revenue/?start_date={start}&end_date={today}&granularity=week&group_by=service,staff',
+        )
+
+    def test_payment_approval_queue(self):
+        self.assertNoFullScans(self.staff, '/api/payments/approval-queue/')
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='cache_admin', password='SmartSalon@123', role='ADMIN')
+        self.staff = User.objects.create_user(username='cache_staff', password='SmartSalon@123', role='STAFF')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.admin).access_token}')
+
+    def test_cached_responses_follow_model_generations(self):
+        slot_date = timezone.localdate() + timedelta(days=2)
+        schedules_url = f'/api/staff-schedules/?date={slot_date}'
+        self.assertEqual(self.client.get('/api/staff/').data[0]['first_name'], '')
+        self.assertEqual(self.client.get(schedules_url).data, [])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/staff/')
+            self.client.get(schedules_url)
+        # Only the token version lookups and the schedule list's ETag validator reach the database.
+        self.assertEqual(len(queries), 3)
+
+        self.staff.first_name = 'Rita'
+        self.staff.save(update_fields=['first_name'])
+        StaffSchedule.objects.create(staff=self.staff, schedule_date=slot_date, start_time='09:00', end_time='12:00')
+        self.assertEqual(self.client.get('/api/staff/').data[0]['first_name'], 'Rita')
+        self.assertEqual(len(self.client.get(schedules_url).data), 1)
+        self.assertEqual(cache_stats()['StaffListAPIView'], {'hits': 1, 'misses': 2, 'hit_ratio': 0.333})
+
+    def test_lost_generation_never_repeats_an_earlier_value(self):
+        before = caching.generation(caching.STAFF)
+        caching.invalidate(caching.STAFF)
+        cache.delete(caching.generation_key(caching.STAFF))
+        caching.invalidate(caching.STAFF)
+        self.assertGreater(caching.generation(caching.STAFF), before + 1)
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        STORES['local'].clear()
+        self.client = APIClient()
+
+    def test_bucket_settings_are_validated_at_startup(self):
+        for value in ('0/60', '10/0', '10/-5', '10/inf', '10', 'ten/60'):
+            with self.subTest(value=value), mock.patch.dict(os.environ, {'THROTTLE_TEST': value}):
+                with self.assertRaises(ValueError):
+                    env_bucket('THROTTLE_TEST', '60/60')
+        with mock.patch.dict(os.environ, {'THROTTLE_TEST': ''}):
+            self.assertEqual(env_bucket('THROTTLE_TEST', '60/60'), '')
+        self.assertEqual(env_bucket('THROTTLE_UNSET', '20/300'), '20/300')
+
+    @override_settings(THROTTLE_BUCKETS={'auth': '2/60'})
+    def test_auth_bucket_refuses_with_retry_after_once_spent(self):
+        User.objects.create_user(username='throttled', password='SmartSalon@123')
+        payload = {'username': 'throttled', 'password': 'SmartSalon@123'}
+        # A fresh X-Forwarded-For per attempt must not reset the client's bucket.
+        for attempt in range(2):
+            response = self.client.post(
+                '/api/accounts/login/', payload, format='json', HTTP_X_FORWARDED_FOR=f'10.9.9.{attempt}'
+            )
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/accounts/login/', payload, format='json', HTTP_X_FORWARDED_FOR='10.9.9.9')
+        self.assertEqual(response.status_code, 429)
+        # One token refills every 30s; slow password hashing may already have earned part of it.
+        self.assertIn(int(response['Retry-After']), range(1, 31))
+
+    @override_settings(THROTTLE_STORE='local', THROTTLE_BUCKETS={'read': '1/60', 'slots': '5/60'})
+    def test_buckets_are_per_user_and_endpoint_class(self):
+        first = User.objects.create_user(username='bucket_one', password='SmartSalon@123')
+        second = User.objects.create_user(username='bucket_two', password='SmartSalon@123')
+        for user in (first, second):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+            self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 200)
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 429)
+        slots = self.client.get('/api/available-slots/', {'staff_id': first.pk, 'date': timezone.localdate()})
+        self.assertNotEqual(slots.status_code, 429)
+
+
+class HealthTests(TestCase):
+    def test_liveness_does_no_io(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/health/live/')
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_readiness_is_served_from_the_last_snapshot(self):
+        monitor = HealthMonitor()
+        # The checker thread is driven by hand so the test controls when checks run.
+        monitor.STARTUP_WAIT = 0
+        with mock.patch('smartsalon_backend.views.monitor', monitor), mock.patch.object(monitor, 'start'):
+            self.assertEqual(self.client.get('/health/ready/').status_code, 503)
+            # The legacy deploy probe keeps passing until the first check has run.
+            self.assertEqual(self.client.get('/health/').status_code, 200)
+            monitor.refresh()
+            with self.assertNumQueries(0):
+                for _ in range(5):
+                    response = self.client.get('/health/ready/')
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertEqual(body['migrations'], {'status': 'ok', 'pending': 0})
+            self.assertIn('latency_ms', body['database'])
+            self.assertEqual(body['threads']['busy'], 1)
+
+            monitor._snapshot['checked_at'] -= monitor.interval * monitor.STALE_INTERVALS + 1
+            self.assertEqual(self.client.get('/health/').json()['status'], 'stale')
@@ -0,0 +1,112 @@
+import math
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+
+@lru_cache(maxsize=None)
+def parse_bucket(value):
+    """``'capacity/seconds'``: hold up to ``capacity`` tokens, refilled evenly over ``seconds``.
+
+    ``settings.env_bucket`` has already rejected non-positive values at startup.
+    """
+    capacity, seconds = value.split('/')
+    return int(capacity), int(capacity) / float(seconds)
+
+
+def spend(state, capacity, rate, now):
+    """Refill ``state`` (tokens, updated_at) up to ``now`` and try to take one token.
+
+    Returns the new state and how long to wait before a token is available
+    (0 when the request may proceed).
+    """
+    tokens, updated_at = state if state else (capacity, now)
+    tokens = min(capacity, tokens + max(now - updated_at, 0) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class LocalBucketStore:
+    """Buckets in a dict owned by this worker process.
+
+    The least recently used buckets are dropped past ``max_keys``; an idle
+    bucket has refilled anyway, so forgetting it only resets it to full.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, now):
+        with self._lock:
+            state, wait = spend(self._buckets.pop(key, None), capacity, rate, now)
+            if len(self._buckets) >= self.max_keys:
+                del self._buckets[next(iter(self._buckets))]
+            self._buckets[key] = state
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in a Django cache, shared by every worker using that backend.
+
+    The read-modify-write is not atomic, so concurrent requests for the same
+    key can occasionally spend one token twice; budgets are approximate by at
+    most the number of concurrent workers.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def take(self, key, capacity, rate, now):
+        cache = caches[self.alias]
+        state, wait = spend(cache.get(key), capacity, rate, now)
+        cache.set(key, state, timeout=math.ceil(capacity / rate) + 1)
+        return wait
+
+
+STORES = {
+    'local': LocalBucketStore(),
+    'cache': CacheBucketStore(),
+}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Token buckets per user and endpoint class, from ``THROTTLE_BUCKETS``.
+
+    Views choose a class with ``throttle_scope`` (``slots``, ``auth``);
+    otherwise safe methods spend from ``read`` and the rest from ``write``.
+    Anonymous callers and the ``auth`` class are keyed by client IP, since
+    there is no trustworthy user yet.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None) or ('read' if request.method in SAFE_METHODS else 'write')
+        bucket = settings.THROTTLE_BUCKETS.get(scope)
+        if not bucket:
+            return True
+        user = getattr(request, 'user', None)
+        if scope != 'auth' and user is not None and user.is_authenticated:
+            ident = f'user:{user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        capacity, rate = parse_bucket(bucket)
+        self._wait = STORES[settings.THROTTLE_STORE].take(f'throttle:{scope}:{ident}', capacity, rate, time.time())
+        if self._wait:
+            metrics.increment(f'throttle.{scope}.rejected')
+        return not self._wait
+
+    def wait(self):
+        return self._wait
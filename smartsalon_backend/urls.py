@@ -17,11 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
-from .views import health_check, service_root
+from .views import health_check, health_live, health_ready, service_root
 
 urlpatterns = [
     path('', service_root, name='service-root'),
     path('health/', health_check, name='health-check'),
+    path('health/live/', health_live, name='health-live'),
+    path('health/ready/', health_ready, name='health-ready'),
     path('admin/', admin.site.urls),
     path('api/accounts/', include('accounts.api_urls')),
     path('api/', include('appointments.api_urls')),
@@ -1,8 +1,9 @@
-from django.db import connections
 from django.http import JsonResponse
 from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_GET
 
+from .health import monitor
+
 
 @never_cache
 @require_GET
@@ -11,31 +12,30 @@ def service_root(request):
         {
             'service': 'SmartSalon API',
             'status': 'ok',
-            'health_check': '/health/',
+            'health_check': '/health/ready/',
+            'liveness_check': '/health/live/',
         }
     )
 
 
 @never_cache
 @require_GET
-def health_check(request):
-    try:
-        with connections['default'].cursor() as cursor:
-            cursor.execute('SELECT 1')
-            cursor.fetchone()
-    except Exception as exc:
-        return JsonResponse(
-            {
-                'status': 'error',
-                'database': 'unavailable',
-                'detail': str(exc),
-            },
-            status=503,
-        )
+def health_live(request):
+    # No I/O: only proves the worker can still answer requests.
+    return JsonResponse({'status': 'ok'})
 
-    return JsonResponse(
-        {
-            'status': 'ok',
-            'database': 'reachable',
-        }
-    )
+
+@never_cache
+@require_GET
+def health_ready(request):
+    snapshot = monitor.snapshot()
+    return JsonResponse(snapshot, status=200 if snapshot['status'] == 'ok' else 503)
+
+
+@never_cache
+@require_GET
+def health_check(request):
+    # Kept for existing deploy configs that probe ``/health/``: like readiness, except that a worker still
+    # running its first check passes instead of being taken out of rotation.
+    snapshot = monitor.snapshot()
+    return JsonResponse(snapshot, status=200 if snapshot['status'] in ('ok', 'starting') else 503)